@@ -1,11 +1,41 @@
-from . import tests
-from . import defaults
-from .scripting import (
-    registeredTests,
-    testGlyph,
-    testLayer,
-    testFont,
-    formatGlyphReport,
-    formatLayerReport,
-    formatFontReport
-)
\ No newline at end of file
+# The scripting API is imported on first use
+# so that importing the package at launch
+# doesn't import the test implementations.
+
+_scriptingNames = (
+    "registeredTests",
+    "testGlyph",
+    "testLayer",
+    "testFont",
+    "testFontForNearDuplicateGlyphs",
+    "testFontsForCompatibility",
+    "testFontForFirstIssues",
+    "testLayerForFirstIssues",
+    "testGlyphForFirstIssue",
+    "glyphHasIssue",
+    "formatGlyphReport",
+    "formatLayerReport",
+    "formatFontReport",
+    "summarizeFontReport"
+)
+
+def __getattr__(name):
+    if name in _scriptingNames:
+        from . import scripting
+        return getattr(scripting, name)
+    if name == "testUFOIncremental":
+        from . import incremental
+        return incremental.testUFOIncremental
+    if name in ("testFontSample", "testLayerSample"):
+        from . import sampling
+        return getattr(sampling, name)
+    if name in ("annotateFont", "revertAnnotations"):
+        from . import annotate
+        return getattr(annotate, name)
+    if name in ("Issue", "IssueCollection", "makeGlyphIssues"):
+        from . import issues
+        return getattr(issues, name)
+    if name in ("testGlyphAsync", "testLayerAsync", "testFontAsync", "iterateLayerTests"):
+        from . import asyncTesting
+        return getattr(asyncTesting, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -0,0 +1,192 @@
+"""
+Apply a report to a font.
+
+All of the changes are made in one pass while the
+notifications of the font and its glyphs are held, so
+observers and the UI are only updated once. The previous
+values are returned in a record that can be given to
+revertAnnotations to restore them all in one step.
+
+RoboFont has no undo that spans the glyphs of a font.
+When the font is a RoboFont font, the change to each
+glyph is registered with that glyph's undo, so it can
+be undone in the glyph editor, but undoing the whole
+annotation is done with revertAnnotations.
+"""
+
+import contextlib
+from .scripting import summarizeFontReport
+
+issuesLibKey = "com.typesupply.GlyphNanny.issues"
+
+# (minimum issue count, color)
+defaultSeverityColors = [
+    (1, (1, 0.7, 0, 0.5)),
+    (10, (1, 0, 0, 0.5))
+]
+
+def annotateFont(
+        font,
+        report,
+        severityColors=None,
+        mark=True,
+        lib=True,
+        smartSetName=None
+    ):
+    if severityColors is None:
+        severityColors = defaultSeverityColors
+    severityColors = sorted(severityColors, key=lambda item: item[0])
+    wrappedFont = font
+    font = _getDefconFont(font)
+    summary = summarizeFontReport(report)
+    record = dict(
+        marks={},
+        libs={},
+        smartSet=None
+    )
+    heldObjects = [font]
+    font.holdNotifications()
+    try:
+        for glyphName in report.keys():
+            if glyphName not in font:
+                continue
+            glyph = font[glyphName]
+            glyph.holdNotifications()
+            heldObjects.append(glyph)
+            glyphSummary = summary.get(glyphName, {})
+            with _glyphUndo(wrappedFont, glyphName):
+                if mark:
+                    color = _getSeverityColor(sum(glyphSummary.values()), severityColors)
+                    _setMarkColor(glyph, color, record)
+                if lib:
+                    _setIssuesLib(glyph, glyphSummary, record)
+    finally:
+        _releaseHeldNotifications(heldObjects)
+    if smartSetName is not None:
+        record["smartSet"] = _setSmartSet(smartSetName, list(summary.keys()))
+    return record
+
+def revertAnnotations(font, record):
+    wrappedFont = font
+    font = _getDefconFont(font)
+    heldObjects = [font]
+    font.holdNotifications()
+    try:
+        glyphNames = set(record["marks"]) | set(record["libs"])
+        for glyphName in glyphNames:
+            if glyphName in font:
+                glyph = font[glyphName]
+                glyph.holdNotifications()
+                heldObjects.append(glyph)
+        for glyphName in glyphNames:
+            if glyphName not in font:
+                continue
+            glyph = font[glyphName]
+            with _glyphUndo(wrappedFont, glyphName):
+                if glyphName in record["marks"]:
+                    glyph.markColor = record["marks"][glyphName]
+                if glyphName in record["libs"]:
+                    value = record["libs"][glyphName]
+                    if value is None:
+                        if issuesLibKey in glyph.lib:
+                            del glyph.lib[issuesLibKey]
+                    else:
+                        glyph.lib[issuesLibKey] = value
+    finally:
+        _releaseHeldNotifications(heldObjects)
+    smartSetRecord = record["smartSet"]
+    if smartSetRecord is not None:
+        _revertSmartSet(*smartSetRecord)
+
+def _getDefconFont(font):
+    if hasattr(font, "naked"):
+        font = font.naked()
+    return font
+
+def _glyphUndo(font, glyphName):
+    # RoboFont's glyphs have an undo context.
+    # defcon's glyphs have an undo method that
+    # does something else, so only wrapped
+    # glyphs are checked.
+    if hasattr(font, "naked"):
+        glyph = font[glyphName]
+        if hasattr(glyph, "undo"):
+            return glyph.undo("Glyph Nanny Annotations")
+    return contextlib.nullcontext()
+
+def _releaseHeldNotifications(objects):
+    # the glyphs are released before the font
+    # so that the font is notified last.
+    for obj in reversed(objects):
+        obj.releaseHeldNotifications()
+
+def _getSeverityColor(issueCount, severityColors):
+    color = None
+    for minimum, severityColor in severityColors:
+        if issueCount >= minimum:
+            color = severityColor
+    return color
+
+# -----
+# Glyph
+# -----
+
+def _setMarkColor(glyph, color, record):
+    previous = glyph.markColor
+    if previous is not None:
+        previous = tuple(previous)
+    if color is not None:
+        color = tuple(color)
+    if color == previous:
+        return
+    record["marks"][glyph.name] = previous
+    glyph.markColor = color
+
+def _setIssuesLib(glyph, glyphSummary, record):
+    previous = glyph.lib.get(issuesLibKey)
+    value = None
+    if glyphSummary:
+        value = dict(glyphSummary)
+    if value == previous:
+        return
+    record["libs"][glyph.name] = previous
+    if value is None:
+        del glyph.lib[issuesLibKey]
+    else:
+        glyph.lib[issuesLibKey] = value
+
+# ---------
+# Smart Set
+# ---------
+
+def _setSmartSet(name, glyphNames):
+    from mojo.smartSet import (
+        SmartSet,
+        addSmartSet,
+        removeSmartSet,
+        getSmartSets
+    )
+    previous = None
+    for smartSet in getSmartSets():
+        if smartSet.name == name:
+            previous = list(smartSet.glyphNames)
+            removeSmartSet(name)
+            break
+    smartSet = SmartSet()
+    smartSet.name = name
+    smartSet.glyphNames = glyphNames
+    addSmartSet(smartSet)
+    return (name, previous)
+
+def _revertSmartSet(name, previous):
+    from mojo.smartSet import (
+        SmartSet,
+        addSmartSet,
+        removeSmartSet
+    )
+    removeSmartSet(name)
+    if previous is not None:
+        smartSet = SmartSet()
+        smartSet.name = name
+        smartSet.glyphNames = previous
+        addSmartSet(smartSet)
@@ -0,0 +1,158 @@
+"""
+asyncio versions of the testing functions.
+
+The glyphs are tested in chunks. Control is given back to
+the event loop after every chunk, so other tasks keep
+running while a large font is tested. A chunk can be run
+in an executor instead of on the event loop. The chunks
+are run one after the other, never at the same time, so
+the font is only used by one thread at a time. Fonts that
+are open in RoboFont should not be tested in an executor
+because the notifications sent while testing can update
+the user interface.
+
+Cancelling the task stops the testing after the chunk
+that is being tested.
+"""
+
+import asyncio
+import functools
+from .tests.registry import BatchCache
+from .scripting import (
+    registeredTests,
+    testGlyph,
+    _getTestingOrder,
+    _getDefconLayer
+)
+
+async def testGlyphAsync(glyph, tests=None, ignoreOverlap=False, executor=None):
+    call = functools.partial(testGlyph, glyph, tests=tests, ignoreOverlap=ignoreOverlap)
+    if executor is not None:
+        return await _runInExecutor(executor, call)
+    report = call()
+    await asyncio.sleep(0)
+    return report
+
+async def testFontAsync(
+        font,
+        tests=None,
+        ignoreOverlap=False,
+        cachePolicy="keep",
+        cacheSize=None,
+        executor=None,
+        chunkSize=1
+    ):
+    layer = font.defaultLayer
+    return await testLayerAsync(
+        layer,
+        tests=tests,
+        ignoreOverlap=ignoreOverlap,
+        cachePolicy=cachePolicy,
+        cacheSize=cacheSize,
+        executor=executor,
+        chunkSize=chunkSize
+    )
+
+async def testLayerAsync(
+        layer,
+        tests=None,
+        ignoreOverlap=False,
+        cachePolicy="keep",
+        cacheSize=None,
+        executor=None,
+        chunkSize=1
+    ):
+    report = {}
+    progress = iterateLayerTests(
+        layer,
+        tests=tests,
+        ignoreOverlap=ignoreOverlap,
+        cachePolicy=cachePolicy,
+        cacheSize=cacheSize,
+        executor=executor,
+        chunkSize=chunkSize
+    )
+    async for item in progress:
+        report[item["glyphName"]] = item["report"]
+    testingOrder, glyphOrder = _getTestingOrder(layer)
+    return {name : report[name] for name in glyphOrder if name in report}
+
+async def iterateLayerTests(
+        layer,
+        tests=None,
+        ignoreOverlap=False,
+        cachePolicy="keep",
+        cacheSize=None,
+        executor=None,
+        chunkSize=1
+    ):
+    """
+    Test the glyphs in the layer and yield the
+    report for each glyph as soon as its chunk
+    has been tested.
+
+    Data structure:
+
+        {
+            glyphName : string
+            report : dictionary
+            completed : number
+            total : number
+        }
+    """
+    if tests is None:
+        tests = registeredTests().keys()
+    tests = list(tests)
+    chunkSize = max(1, chunkSize)
+    defconLayer = _getDefconLayer(layer)
+    testingOrder, glyphOrder = _getTestingOrder(layer)
+    total = len(testingOrder)
+    batchCache = BatchCache(cachePolicy, cacheSize)
+    completed = 0
+    try:
+        for start in range(0, total, chunkSize):
+            chunk = testingOrder[start:start + chunkSize]
+            call = functools.partial(
+                _testChunk,
+                layer,
+                defconLayer,
+                chunk,
+                tests,
+                ignoreOverlap,
+                batchCache
+            )
+            if executor is not None:
+                chunkReports = await _runInExecutor(executor, call)
+            else:
+                chunkReports = call()
+                await asyncio.sleep(0)
+            for glyphName, glyphReport in chunkReports:
+                completed += 1
+                yield dict(
+                    glyphName=glyphName,
+                    report=glyphReport,
+                    completed=completed,
+                    total=total
+                )
+    finally:
+        batchCache.finish(defconLayer)
+
+async def _runInExecutor(executor, call):
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor, call)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        # the call can't be interrupted. wait for
+        # it to finish so that the font is never
+        # used by two threads at the same time.
+        await asyncio.wait([future])
+        raise
+
+def _testChunk(layer, defconLayer, glyphNames, tests, ignoreOverlap, batchCache):
+    reports = []
+    for glyphName in glyphNames:
+        glyphReport = testGlyph(layer[glyphName], tests=tests, ignoreOverlap=ignoreOverlap)
+        batchCache.glyphTested(defconLayer[glyphName])
+        reports.append((glyphName, glyphReport))
+    return reports
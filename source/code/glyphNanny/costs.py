@@ -0,0 +1,106 @@
+"""
+Observed test costs.
+
+The time it takes to run a test is recorded along with
+the number of points in the object that was tested. The
+cost per point is kept as an exponential moving average
+so that the estimates follow the current machine and the
+current font. The estimates are used to decide which
+tests can run while the user is dragging.
+"""
+
+from .tests.manifest import getTestCost
+
+smoothing = 0.2
+
+
+class TestCostModel(object):
+
+    def __init__(self):
+        self._secondsPerPoint = {}
+        self._samples = {}
+
+    def record(self, testIdentifier, seconds, pointCount):
+        """
+        Record that running testIdentifier on an object
+        with pointCount points took seconds.
+        """
+        value = seconds / max(pointCount, 1)
+        previous = self._secondsPerPoint.get(testIdentifier)
+        if previous is not None:
+            value = previous + smoothing * (value - previous)
+        self._secondsPerPoint[testIdentifier] = value
+        self._samples[testIdentifier] = self._samples.get(testIdentifier, 0) + 1
+
+    def estimate(self, testIdentifier, pointCount):
+        """
+        Estimate the seconds it will take to run
+        testIdentifier on an object with pointCount
+        points. None is returned if the test has
+        not been measured.
+        """
+        secondsPerPoint = self._secondsPerPoint.get(testIdentifier)
+        if secondsPerPoint is None:
+            return None
+        return secondsPerPoint * max(pointCount, 1)
+
+    def chooseTests(self, testPointCounts, latencyTarget):
+        """
+        Choose the tests that can run within latencyTarget.
+
+        testPointCounts is a dictionary of test identifiers
+        and the point counts of the objects the test will
+        be run on. The cheapest tests are chosen first.
+        Tests that have not been measured are only chosen
+        if they have the lowest cost rank in the manifest.
+        """
+        estimates = []
+        unmeasured = []
+        for testIdentifier, pointCounts in testPointCounts.items():
+            total = 0
+            for pointCount in pointCounts:
+                estimate = self.estimate(testIdentifier, pointCount)
+                if estimate is None:
+                    total = None
+                    break
+                total += estimate
+            if total is None:
+                if getTestCost(testIdentifier) == 1:
+                    unmeasured.append(testIdentifier)
+                continue
+            estimates.append((total, testIdentifier))
+        chosen = set(unmeasured)
+        spent = 0
+        for total, testIdentifier in sorted(estimates):
+            if spent + total > latencyTarget:
+                break
+            spent += total
+            chosen.add(testIdentifier)
+        return chosen
+
+    def getTimings(self):
+        """
+        Get the current timings.
+
+        Data structure:
+
+            {
+                testIdentifier : {
+                    secondsPerPoint : number
+                    samples : number
+                }
+            }
+        """
+        timings = {}
+        for testIdentifier, secondsPerPoint in self._secondsPerPoint.items():
+            timings[testIdentifier] = dict(
+                secondsPerPoint=secondsPerPoint,
+                samples=self._samples[testIdentifier]
+            )
+        return timings
+
+
+# The model is shared by all glyph editors
+# and the preferences window.
+
+costModel = TestCostModel()
@@ -3,12 +3,14 @@ from mojo.extensions import (
     getExtensionDefault,
     setExtensionDefault
 )
-from .tests.registry import testRegistry
+from .tests.manifest import testManifest
 
 defaultKeyStub = "com.typesupply.GlyphNanny2."
 defaults = {
     defaultKeyStub + "displayLiveReport" : True,
     defaultKeyStub + "testDuringDrag" : False,
+    defaultKeyStub + "dragLatencyTarget" : 0.01,
+    defaultKeyStub + "degradePointThreshold" : 10000,
     defaultKeyStub + "displayTitles" : True,
     defaultKeyStub + "colorInform" : (0, 0, 0.7, 0.3),
     defaultKeyStub + "colorReview" : (1, 0.7, 0, 0.7),
@@ -20,7 +22,7 @@ defaults = {
     defaultKeyStub + "textFontWeight" : "medium",
     defaultKeyStub + "textPointSize" : 10,
 }
-for testIdentifier in testRegistry.keys():
+for testIdentifier in testManifest.keys():
     defaults[defaultKeyStub + "testState." + testIdentifier] = True
 
 registerExtensionDefaults(defaults)
@@ -55,6 +57,22 @@ def getTestDuringDrag():
 def setTestDuringDrag(value):
     setExtensionDefault(defaultKeyStub + "testDuringDrag", value)
 
+# Drag Latency Target
+
+def getDragLatencyTarget():
+    return getExtensionDefault(defaultKeyStub + "dragLatencyTarget")
+
+def setDragLatencyTarget(value):
+    setExtensionDefault(defaultKeyStub + "dragLatencyTarget", value)
+
+# Degrade Point Threshold
+
+def getDegradePointThreshold():
+    return getExtensionDefault(defaultKeyStub + "degradePointThreshold")
+
+def setDegradePointThreshold(value):
+    setExtensionDefault(defaultKeyStub + "degradePointThreshold", value)
+
 # Titles
 
 def getDisplayTitles():
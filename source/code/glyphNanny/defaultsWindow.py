@@ -2,6 +2,8 @@ import ezui
 from mojo.events import postEvent
 from . import defaults
 from .testTabs import makeTestsTableDescription
+from .tests.manifest import testManifest
+from .costs import costModel
 
 
 class GlyphNannyDefaultsWindow(ezui.WindowController):
@@ -16,16 +18,63 @@ class GlyphNannyDefaultsWindow(ezui.WindowController):
         )
 
         # Test During Drag
+        # By default only the tests that fit in the
+        # drag latency target run during a drag.
         testDuringDragCheckboxDescription = dict(
             identifier="testDuringDrag",
             type="Checkbox",
-            text="Test During Drag",
+            text="Run All Tests During Drag",
             value=defaults.getTestDuringDrag()
         )
 
+        # Drag Latency Target
+        dragLatencyTargetDescription = dict(
+            type="HorizontalStack",
+            contents=[
+                dict(
+                    identifier="dragLatencyTarget",
+                    type="NumberEntryTextField",
+                    valueType="float",
+                    minValue=0,
+                    value=defaults.getDragLatencyTarget() * 1000,
+                    width=50
+                ),
+                dict(
+                    type="Label",
+                    text="ms Drag Latency Target"
+                )
+            ]
+        )
+
         # Tests
         testsTableDescription = makeTestsTableDescription()
 
+        # Timings
+        timingItems = self._makeTimingItems()
+        timingsTableDescription = dict(
+            identifier="testTimings",
+            type="Table",
+            columnDescriptions=[
+                dict(
+                    identifier="title",
+                    title="Test"
+                ),
+                dict(
+                    identifier="perPoint",
+                    title="µs/Point",
+                    width=60
+                ),
+                dict(
+                    identifier="samples",
+                    title="Runs",
+                    width=40
+                )
+            ],
+            items=timingItems,
+            allowsSelection=False,
+            height=120
+        )
+
         # Colors
         informationColorWell = dict(
             identifier="informationColor",
@@ -121,7 +170,18 @@ class GlyphNannyDefaultsWindow(ezui.WindowController):
             contents=[
                 liveReportCheckboxDescription,
                 testDuringDragCheckboxDescription,
+                dragLatencyTargetDescription,
                 testsTableDescription,
+                dict(
+                    type="Label",
+                    text="Measured Test Timings"
+                ),
+                timingsTableDescription,
+                dict(
+                    identifier="refreshTimingsButton",
+                    type="PushButton",
+                    text="Refresh Timings"
+                ),
                 colorsGridDescription,
                 reportTitlesCheckboxDescription,
             ],
@@ -141,6 +201,24 @@ class GlyphNannyDefaultsWindow(ezui.WindowController):
     def started(self):
         self.w.open()
 
+    def _makeTimingItems(self):
+        timingItems = []
+        for testIdentifier, timing in sorted(costModel.getTimings().items()):
+            timingItems.append(
+                dict(
+                    title=testManifest[testIdentifier]["title"],
+                    perPoint="%.1f" % (timing["secondsPerPoint"] * 1000000),
+                    samples=timing["samples"]
+                )
+            )
+        return timingItems
+
+    def refreshTimingsButtonCallback(self, sender):
+        # the timings keep changing while glyphs
+        # are edited, so they are only read when
+        # asked for.
+        self.w.getItem("testTimings").set(self._makeTimingItems())
+
     def defaultsStackCallback(self, sender):
         values = sender.get()
         defaults.setColorInform(values["informationColor"])
@@ -149,6 +227,9 @@ class GlyphNannyDefaultsWindow(ezui.WindowController):
         defaults.setColorRemove(values["removeColor"])
         defaults.setDisplayLiveReport(values["liveReport"])
         defaults.setTestDuringDrag(values["testDuringDrag"])
+        dragLatencyTarget = values["dragLatencyTarget"]
+        if dragLatencyTarget is not None:
+            defaults.setDragLatencyTarget(max(0, dragLatencyTarget) / 1000)
         defaults.setDisplayTitles(values["reportTitles"])
         for testItem in values["testStates"]:
             if isinstance(testItem, ezui.TableGroupRow):
@@ -161,14 +242,26 @@ class GlyphNannyDefaultsWindow(ezui.WindowController):
             defaults.defaultKeyStub + ".defaultsChanged"
         )
 
-    haveShownTestDuringDragNote = False
+    haveShownRestartNote = False
 
     def testDuringDragCallback(self, sender):
-        if not self.haveShownTestDuringDragNote:
+        self._showRestartNote()
+        stack = self.w.findItem("defaultsStack")
+        self.defaultsStackCallback(stack)
+
+    def dragLatencyTargetCallback(self, sender):
+        # turning the target on or off changes
+        # the update delay in the glyph editor.
+        value = sender.get()
+        if value is not None and bool(value) != bool(defaults.getDragLatencyTarget()):
+            self._showRestartNote()
+        stack = self.w.findItem("defaultsStack")
+        self.defaultsStackCallback(stack)
+
+    def _showRestartNote(self):
+        if not self.haveShownRestartNote:
             self.showMessage(
                 "This change will take effect after RoboFont is restarted.",
                 "You'll have to restart RoboFont yourself."
             )
-            self.haveShownTestDuringDragNote = True
-        stack = self.w.findItem("defaultsStack")
-        self.defaultsStackCallback(stack)
\ No newline at end of file
+            self.haveShownRestartNote = True
\ No newline at end of file
@@ -1,3 +1,5 @@
+import time
+import defcon
 import merz
 from mojo.UI import (
     getDefault,
@@ -12,16 +14,34 @@ from mojo.subscriber import (
     registerGlyphEditorSubscriber
 )
 from . import defaults
+from .tests import loadTests
 from .tests.registry import testRegistry
+from .tests.manifest import (
+    getTestCost,
+    degradedTestCost
+)
+from .scheduler import JobScheduler
+from .costs import costModel
 from .tests.tools import (
     convertBoundsToRect,
     calculateMidpoint
 )
 from .tests.wrappers import *
 
+def getContourKey(contour):
+    """
+    Get a key for the geometry of the contour.
+    """
+    return tuple(
+        (point.x, point.y, point.segmentType, point.smooth)
+        for point in contour.naked()
+    )
+
+
 class GlyphNannyEditorDisplayManager(Subscriber):
 
     def build(self):
+        loadTests()
         self.loadUserDefaults()
         addObserver(
             self,
@@ -29,6 +49,7 @@ class GlyphNannyEditorDisplayManager(Subscriber):
             defaults.defaultKeyStub + ".defaultsChanged"
         )
 
+        self.fontLevelTests = []
         self.glyphInfoLevelTests = []
         self.metricsLevelTests = []
         self.glyphLevelTests = []
@@ -37,7 +58,9 @@ class GlyphNannyEditorDisplayManager(Subscriber):
         self.pointLevelTests = []
         for testIdentifier, testData in testRegistry.items():
             level = testData["level"]
-            if level == "glyphInfo":
+            if level == "font":
+                self.fontLevelTests.append(testIdentifier)
+            elif level == "glyphInfo":
                 self.glyphInfoLevelTests.append(testIdentifier)
             elif level == "metrics":
                 self.metricsLevelTests.append(testIdentifier)
@@ -50,6 +73,7 @@ class GlyphNannyEditorDisplayManager(Subscriber):
             elif level == "point":
                 self.pointLevelTests.append(testIdentifier)
 
+        self.scheduler = JobScheduler()
         self.contourContainers = {}
         self.contourContainerTestIdentifiers = (
             self.contourLevelTests
@@ -66,6 +90,7 @@ class GlyphNannyEditorDisplayManager(Subscriber):
         self.buildGlyphContainers()
 
     def destroy(self):
+        self.scheduler.cancel()
         removeObserver(
             self,
             defaults.defaultKeyStub + ".defaultsChanged"
@@ -82,7 +107,6 @@ class GlyphNannyEditorDisplayManager(Subscriber):
     # -----------------
 
     glyph = None
-    glyphContours = None
 
     def glyphEditorDidSetGlyph(self, info):
         glyph = info["glyph"]
@@ -107,6 +131,9 @@ class GlyphNannyEditorDisplayManager(Subscriber):
 
     def loadUserDefaults(self):
         self.showReport = defaults.getDisplayLiveReport()
+        self.testDuringDrag = defaults.getTestDuringDrag()
+        self.dragLatencyTarget = defaults.getDragLatencyTarget()
+        self.degradePointThreshold = defaults.getDegradePointThreshold()
         self.colorBackground = getDefault(appearanceColorKey("glyphViewBackgroundColor"))
         self.colorReview = defaults.getColorReview()
         self.colorRemove = defaults.getColorRemove()
@@ -127,7 +154,10 @@ class GlyphNannyEditorDisplayManager(Subscriber):
     # -----
 
     def _get_feedbackUpdateSpeed(self):
-        if defaults.getTestDuringDrag():
+        # with a latency target, the cost model keeps
+        # the drag responsive so there is no need to
+        # wait for the drag to pause.
+        if defaults.getTestDuringDrag() or defaults.getDragLatencyTarget():
             return 0
         return 0.05
 
@@ -141,16 +171,60 @@ class GlyphNannyEditorDisplayManager(Subscriber):
         self.updateLayers()
 
     def glyphEditorGlyphDidChangeContours(self, info):
-        glyph = info["glyph"]
-        contours = list(glyph.contours)
-        if contours != self.glyphContours:
-            self.destroyContourContainers()
-            self.buildContourContainers()
+        # contours that were added, removed or
+        # replaced are handled by updateLayers.
         self.updateLayers()
 
     def glyphEditorGlyphDidChangeComponents(self, info):
         self.updateLayers()
 
+    isDragging = False
+
+    def glyphEditorDidMouseDrag(self, info):
+        self.isDragging = True
+
+    def glyphEditorDidMouseUp(self, info):
+        if not self.isDragging:
+            return
+        self.isDragging = False
+        # run the tests that were
+        # deferred during the drag.
+        self.updateLayers()
+
+    def glyphEditorWantsContextualMenuItems(self, info):
+        if not self.isDegraded():
+            return
+        info["itemDescriptions"].append(
+            ("Run All Glyph Nanny Tests", self.runAllTestsCallback)
+        )
+
+    def runAllTestsCallback(self, sender):
+        self.updateLayers(runAllTests=True)
+
+    # ------------
+    # Degrade Mode
+    # ------------
+
+    def getGlyphPointCount(self):
+        if self.glyph is None:
+            return 0
+        return sum(len(contour) for contour in self.glyph.naked())
+
+    def isDegraded(self):
+        """
+        Glyphs with more points than the threshold
+        only run the expensive tests on demand.
+        """
+        return self.getGlyphPointCount() > self.degradePointThreshold
+
+    def getDegradedTests(self):
+        return [
+            testIdentifier
+            for testIdentifier in testRegistry.keys()
+            if getTestCost(testIdentifier) >= degradedTestCost
+            and testIdentifier not in self.inactiveTests
+        ]
+
     # ----------------
     # Layer Management
     # ----------------
@@ -196,12 +270,9 @@ class GlyphNannyEditorDisplayManager(Subscriber):
             return
         if not self.glyph.contours:
             return
-        contours = []
         with self.container.sublayerGroup():
             for contour in self.glyph.contours:
                 self.buildContourContainer(contour)
-                contours.append(contour)
-        self.glyphContours = contours
 
     def destroyContourContainers(self):
         """
@@ -238,38 +309,126 @@ class GlyphNannyEditorDisplayManager(Subscriber):
         contourContainer = self.contourContainers.pop(contour)
         self.container.removeSublayer(contourContainer)
 
-    def updateLayers(self, forceUpdate=False):
+    def reconcileContourContainers(self):
+        """
+        Make the contour containers match the contours
+        in the glyph. After undo/redo the contours are
+        new objects. Containers of removed contours are
+        given to added contours that have the same
+        geometry, so that what they display is reused.
+        """
+        containerContours = set(self.contourContainers.keys())
+        glyphContours = list(self.glyph)
+        removed = containerContours - set(glyphContours)
+        added = [contour for contour in glyphContours if contour not in containerContours]
+        if removed and added:
+            unused = {}
+            for contour in removed:
+                contourKey = self.contourContainers[contour].getInfoValue("contourKey")
+                if contourKey not in unused:
+                    unused[contourKey] = []
+                unused[contourKey].append(contour)
+            for contour in list(added):
+                candidates = unused.get(getContourKey(contour))
+                if not candidates:
+                    continue
+                oldContour = candidates.pop()
+                self.contourContainers[contour] = self.contourContainers.pop(oldContour)
+                removed.remove(oldContour)
+                added.remove(contour)
+        for contour in removed:
+            self.destroyContourContainer(contour)
+        for contour in added:
+            self.buildContourContainer(contour)
+
+    def updateLayers(self, forceUpdate=False, runAllTests=False):
         # if the contour containers don't match,
         # the mismatched containers need to be
-        # torn down or built. this happens after
-        # undo/redo.
+        # torn down, built or reused. this happens
+        # after undo/redo.
         if self.glyph is not None:
-            containerContours = set(self.contourContainers.keys())
-            glyphContours = set((contour for contour in self.glyph))
-            for contour in containerContours - glyphContours:
-                self.destroyContourContainer(contour)
-            for contour in glyphContours - containerContours:
-                self.buildContourContainer(contour)
+            self.reconcileContourContainers()
+        # degrade mode
+        skippedTests = set()
+        if not runAllTests and self.isDegraded():
+            skippedTests = set(self.getDegradedTests())
         # info
-        self._updateGlyphInfoLayer()
+        self._updateGlyphInfoLayer(skippedTests)
         # metrics
         self._updateMetricsLayer()
+        # the tests are run by the scheduler:
+        # cheap tests first, then expensive tests
+        # until the frame budget is spent. the rest
+        # are finished when the app is idle.
+        # during a drag, only the tests that are
+        # expected to fit in the latency target
+        # are run. the rest are hidden, so that
+        # they don't show results for the old
+        # geometry, and are run on mouse up.
+        dragTests = None
+        if self.isDragging and not self.testDuringDrag and self.glyph is not None:
+            dragTests = self._chooseDragTests()
+        jobs = []
         # glyph
         for testIdentifier in self.glyphLevelTests:
             testLayer = self.container.getSublayer(testIdentifier)
             if self.glyph is None:
                 testLayer.clearSublayers()
                 continue
-            self._updateLayer(testLayer, self.glyph, testIdentifier, forceUpdate)
+            if testIdentifier in skippedTests:
+                self._clearLayer(testLayer)
+                continue
+            if dragTests is not None and testIdentifier not in dragTests:
+                testLayer.setVisible(False)
+                continue
+            testLayer.setVisible(True)
+            jobs.append(self._makeUpdateLayerJob(testLayer, self.glyph, testIdentifier, forceUpdate))
         # contour, segment, points
         if self.glyph is not None:
             for contour in self.glyph.contours:
                 contourContainer = self.contourContainers[contour]
+                contourKey = getContourKey(contour)
+                contourContainer.setInfoValue("contourKey", contourKey)
                 for testIdentifier in self.contourContainerTestIdentifiers:
                     testLayer = contourContainer.getSublayer(testIdentifier)
-                    self._updateLayer(testLayer, contour, testIdentifier, forceUpdate)
+                    if testIdentifier in skippedTests:
+                        self._clearLayer(testLayer)
+                        continue
+                    if dragTests is not None and testIdentifier not in dragTests:
+                        testLayer.setVisible(False)
+                        continue
+                    testLayer.setVisible(True)
+                    jobs.append(self._makeUpdateLayerJob(testLayer, contour, testIdentifier, forceUpdate, contourKey))
+        self.scheduler.schedule(jobs)
+
+    def _chooseDragTests(self):
+        glyph = self.glyph.naked()
+        contourPointCounts = [len(contour) for contour in glyph]
+        glyphPointCount = sum(contourPointCounts)
+        testPointCounts = {}
+        for testIdentifier in self.glyphLevelTests:
+            if testIdentifier not in self.inactiveTests:
+                testPointCounts[testIdentifier] = [glyphPointCount]
+        for testIdentifier in self.contourContainerTestIdentifiers:
+            if testIdentifier not in self.inactiveTests:
+                testPointCounts[testIdentifier] = contourPointCounts
+        return costModel.chooseTests(testPointCounts, self.dragLatencyTarget)
+
+    def _clearLayer(self, layer):
+        if layer.getInfoValue("representedValue") is None:
+            return
+        layer.clearSublayers()
+        layer.setInfoValue("representedValue", None)
+        layer.setInfoValue("representedContourKey", None)
+
+    def _makeUpdateLayerJob(self, layer, obj, testIdentifier, forceUpdate, contourKey=None):
 
-    def _updateGlyphInfoLayer(self):
+        def job():
+            self._updateLayer(layer, obj, testIdentifier, forceUpdate, contourKey)
+
+        return (getTestCost(testIdentifier), job)
+
+    def _updateGlyphInfoLayer(self, skippedTests=()):
         layer = self.container.getSublayer("glyphInfo")
         if self.glyph is None or not self.showReport:
             layer.clearSublayers()
@@ -281,6 +440,16 @@ class GlyphNannyEditorDisplayManager(Subscriber):
                 continue
             representationName = testRegistry[testIdentifier]["representationName"]
             glyphInfoData[testIdentifier] = self.glyph.getRepresentation(representationName)
+        # the font level results are shown with the glyph info.
+        glyph = self.glyph.naked()
+        for testIdentifier in self.fontLevelTests:
+            if testIdentifier in self.inactiveTests:
+                continue
+            representationName = testRegistry[testIdentifier]["representationName"]
+            fontReport = glyph.layer.getRepresentation(representationName)
+            glyphInfoData[testIdentifier] = fontReport.get(glyph.name, [])
+        if skippedTests:
+            glyphInfoData["degradeNotice"] = self._makeDegradeNotice(skippedTests)
         representedValue = layer.getInfoValue("representedValue")
 
         if glyphInfoData != representedValue:
@@ -294,6 +463,14 @@ class GlyphNannyEditorDisplayManager(Subscriber):
             visible = bool(text)
             layer.setVisible(visible)
 
+    def _makeDegradeNotice(self, skippedTests):
+        titles = sorted(testRegistry[testIdentifier]["title"] for testIdentifier in skippedTests)
+        return [
+            "Degrade mode: this glyph has %d points." % self.getGlyphPointCount(),
+            "Skipped: %s." % ", ".join(titles),
+            "Use Run All Glyph Nanny Tests in the contextual menu to run them."
+        ]
+
     def _updateMetricsLayer(self):
         layer = self.container.getSublayer("metrics")
         if self.glyph is None or not self.showReport:
@@ -384,13 +561,36 @@ class GlyphNannyEditorDisplayManager(Subscriber):
                     y += offset
             layer.setVisible(visible)
 
-    def _updateLayer(self, layer, obj, testIdentifier, forceUpdate):
+    def _updateLayer(self, layer, obj, testIdentifier, forceUpdate, contourKey=None):
         if testIdentifier in self.inactiveTests or not self.showReport:
             layer.clearSublayers()
+            layer.setInfoValue("representedContourKey", None)
+            return
+        # the layer already shows the result for a contour
+        # with this geometry. this is the case for contours
+        # that were replaced by undo/redo. tests that depend
+        # on more than the contour are always run.
+        if (
+            contourKey is not None
+            and not forceUpdate
+            and not testRegistry[testIdentifier]["dependencies"]
+            and layer.getInfoValue("representedContourKey") == contourKey
+        ):
             return
         representationName = layer.getInfoValue("representationName")
         representedValue = layer.getInfoValue("representedValue")
+        # only record the cost of actually running
+        # the test, not of getting a cached result.
+        naked = obj.naked()
+        measure = not naked.hasCachedRepresentation(representationName)
+        start = time.perf_counter()
         newValue = obj.getRepresentation(representationName)
+        if measure:
+            if isinstance(naked, defcon.Glyph):
+                pointCount = sum(len(contour) for contour in naked)
+            else:
+                pointCount = len(naked)
+            costModel.record(testIdentifier, time.perf_counter() - start, pointCount)
         needsUpdate = False
         if forceUpdate:
             needsUpdate = True
@@ -399,6 +599,7 @@ class GlyphNannyEditorDisplayManager(Subscriber):
                 pass
             else:
                 needsUpdate = True
+        layer.setInfoValue("representedContourKey", contourKey)
         if needsUpdate:
             layer.setInfoValue("representedValue", newValue)
             methodName = "visualize_" + testIdentifier
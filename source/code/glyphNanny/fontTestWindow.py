@@ -4,7 +4,13 @@ import ezui
 from defconAppKit.windows.baseWindow import BaseWindowController
 from fontParts.world import CurrentFont
 from .testTabs import makeTestsTableDescription
-from .scripting import testFont, formatFontReport
+from .tests.registry import testRegistry
+from .scripting import (
+    testFont,
+    formatGlyphReport,
+    summarizeFontReport
+)
+from .annotate import annotateFont, revertAnnotations
 
 
 class GlyphNannyFontTestWindow(ezui.WindowController):
@@ -70,41 +76,103 @@ class GlyphNannyFontTestWindow(ezui.WindowController):
                 tests.append(identifier)
         ignoreOverlap = self.w.getItem("ignoreOverlap").get()
         # progressBar = self.startProgress(tickCount=len(font))
-        if ignoreOverlap:
-            fontToTest = font.copy()
-            for glyph in font:
-                glyph.removeOverlap()
-        else:
-            fontToTest = font
         try:
             report = testFont(
                 font,
                 tests,
+                ignoreOverlap=ignoreOverlap,
                 # progressBar=progressBar
             )
         finally:
             pass
             # progressBar.close()
-        text = formatFontReport(report)
         FontReportWindow(
             font=font,
-            text=text,
-            glyphsWithIssues=report.keys()
+            report=report
         )
 
 
+levelTitles = [
+    ("font", "Font"),
+    ("glyphInfo", "Glyph Info"),
+    ("glyph", "Glyph"),
+    ("metrics", "Metrics"),
+    ("contour", "Contour"),
+    ("segment", "Segment"),
+    ("point", "Point")
+]
+
+
 class FontReportWindow(ezui.WindowController):
 
-    def build(self, font=None, text=None, glyphsWithIssues=None):
+    def build(self, font=None, report=None):
         self.font = font
-        self.glyphsWithIssues = glyphsWithIssues
+        self.report = report
+        # the summary is small enough to filter
+        # quickly. the text for a glyph is only
+        # formatted when the glyph is selected.
+        self.summary = summarizeFontReport(report)
+        self.formattedReports = {}
         title = "Glyph Nanny Report: Unsaved Font"
         if font.path is not None:
             title = "Glyph Nanny Report: %s" % os.path.basename(font.path)
 
-        textEditorDescription = dict(
+        self.levels = [None] + [level for (level, levelTitle) in levelTitles]
+        self.tests = [None] + sorted(
+            set(
+                testIdentifier
+                for glyphSummary in self.summary.values()
+                for testIdentifier in glyphSummary
+            ),
+            key=lambda testIdentifier: testRegistry[testIdentifier]["title"]
+        )
+        glyphNameFieldDescription = dict(
+            identifier="glyphNameFilter",
+            type="TextField",
+            placeholder="Glyph Name",
+            continuous=True
+        )
+        levelPopUpDescription = dict(
+            identifier="levelFilter",
+            type="PopUpButton",
+            items=["All Levels"] + [levelTitle for (level, levelTitle) in levelTitles]
+        )
+        testPopUpDescription = dict(
+            identifier="testFilter",
+            type="PopUpButton",
+            items=["All Tests"] + [testRegistry[testIdentifier]["title"] for testIdentifier in self.tests[1:]]
+        )
+        filtersDescription = dict(
+            type="HorizontalStack",
+            contents=[
+                glyphNameFieldDescription,
+                levelPopUpDescription,
+                testPopUpDescription
+            ]
+        )
+        glyphTableDescription = dict(
+            identifier="glyphTable",
+            type="Table",
+            columnDescriptions=[
+                dict(
+                    identifier="glyphName",
+                    title="Glyph"
+                ),
+                dict(
+                    identifier="issueCount",
+                    title="Issues",
+                    width=60
+                )
+            ],
+            items=self._makeGlyphTableItems(),
+            allowsMultipleSelection=False,
+            height=">=200"
+        )
+        detailsDescription = dict(
+            identifier="details",
             type="TextEditor",
-            value=text,
+            value="",
+            editable=False,
             height=">=150"
         )
         markButtonDescription = dict(
@@ -112,12 +180,27 @@ class FontReportWindow(ezui.WindowController):
             type="PushButton",
             text="Mark Glyphs"
         )
+        revertButtonDescription = dict(
+            identifier="revertButton",
+            type="PushButton",
+            text="Revert Marks",
+            enabled=False
+        )
+        buttonsDescription = dict(
+            type="HorizontalStack",
+            contents=[
+                markButtonDescription,
+                revertButtonDescription
+            ]
+        )
 
         windowContent = dict(
             type="VerticalStack",
             contents=[
-                textEditorDescription,
-                markButtonDescription
+                filtersDescription,
+                glyphTableDescription,
+                detailsDescription,
+                buttonsDescription
             ]
         )
         windowDescription = dict(
@@ -135,13 +218,97 @@ class FontReportWindow(ezui.WindowController):
     def started(self):
         self.w.open()
 
+    # -------
+    # Filters
+    # -------
+
+    glyphNameFilter = ""
+    levelFilter = None
+    testFilter = None
+
+    def _getFilteredTests(self, glyphSummary):
+        tests = []
+        for testIdentifier in glyphSummary:
+            if self.testFilter is not None and testIdentifier != self.testFilter:
+                continue
+            if self.levelFilter is not None and testRegistry[testIdentifier]["level"] != self.levelFilter:
+                continue
+            tests.append(testIdentifier)
+        return tests
+
+    def _makeGlyphTableItems(self):
+        items = []
+        for glyphName, glyphSummary in self.summary.items():
+            if self.glyphNameFilter and self.glyphNameFilter not in glyphName:
+                continue
+            tests = self._getFilteredTests(glyphSummary)
+            if not tests:
+                continue
+            items.append(
+                dict(
+                    glyphName=glyphName,
+                    issueCount=sum(glyphSummary[testIdentifier] for testIdentifier in tests)
+                )
+            )
+        return items
+
+    def _filtersChanged(self):
+        self.w.getItem("glyphTable").set(self._makeGlyphTableItems())
+        self.glyphTableSelectionCallback(self.w.getItem("glyphTable"))
+
+    def glyphNameFilterCallback(self, sender):
+        self.glyphNameFilter = sender.get().strip()
+        self._filtersChanged()
+
+    def levelFilterCallback(self, sender):
+        self.levelFilter = self.levels[sender.get()]
+        self._filtersChanged()
+
+    def testFilterCallback(self, sender):
+        self.testFilter = self.tests[sender.get()]
+        self._filtersChanged()
+
+    # -------
+    # Details
+    # -------
+
+    def glyphTableSelectionCallback(self, sender):
+        items = sender.getSelectedItems()
+        text = ""
+        if items:
+            text = self._getFormattedReport(items[0]["glyphName"])
+        self.w.getItem("details").set(text)
+
+    def _getFormattedReport(self, glyphName):
+        key = (glyphName, self.levelFilter, self.testFilter)
+        if key not in self.formattedReports:
+            tests = set(self._getFilteredTests(self.summary[glyphName]))
+            glyphReport = {
+                reportKey : value
+                for reportKey, value in self.report[glyphName].items()
+                if reportKey.split(": ", 1)[-1] in tests
+            }
+            self.formattedReports[key] = formatGlyphReport(glyphReport)
+        return self.formattedReports[key]
+
+    annotationRecords = ()
+
     def markButtonCallback(self, sender):
-        for name in self.font.keys():
-            if name in self.glyphsWithIssues:
-                color = (1, 0, 0, 0.5)
-            else:
-                color = None
-            self.font[name].mark = color
+        # each record holds the values from before
+        # its annotation, so the records are kept
+        # and reverted in reverse order.
+        record = annotateFont(
+            self.font,
+            self.report
+        )
+        self.annotationRecords = self.annotationRecords + (record,)
+        self.w.getItem("revertButton").enable(True)
+
+    def revertButtonCallback(self, sender):
+        for record in reversed(self.annotationRecords):
+            revertAnnotations(self.font, record)
+        self.annotationRecords = ()
+        sender.enable(False)
 
 
 if __name__ == "__main__":
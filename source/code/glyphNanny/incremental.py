@@ -0,0 +1,289 @@
+"""
+Incremental testing of UFOs on disk.
+
+A manifest of the .glif and fontinfo.plist hashes is
+stored next to the report. On the next run only the
+glyphs whose files changed are retested, along with
+the glyphs that are affected by the changes:
+
+- composites of changed glyphs are retested with the
+  tests that depend on the component base glyphs.
+- all glyphs are retested with the tests that depend
+  on the font info if fontinfo.plist changed.
+- all glyphs are retested with the tests that depend
+  on the other glyphs in the layer if any glyph was
+  added, removed or changed.
+
+The result is merged into the stored report so that
+the returned report is always complete. The report is
+stored as JSON so that reports from caches or build
+artifacts can be read safely.
+"""
+
+import os
+import json
+import hashlib
+import defcon
+from .tests.registry import testRegistry
+from .tests.indexes import getComponentGraph
+from .scripting import registeredTests, testGlyph
+
+manifestFormatVersion = 1
+
+def testUFOIncremental(path, reportPath, tests=None):
+    if tests is None:
+        tests = registeredTests().keys()
+    tests = sorted(tests)
+    font = defcon.Font(path)
+    manifest = makeManifest(font)
+    manifest["tests"] = tests
+    previousManifest, previousReport = readReport(reportPath)
+    if previousManifest is None or previousManifest.get("tests") != tests:
+        previousManifest = None
+        previousReport = {}
+    retest = getGlyphsToRetest(previousManifest, manifest, tests)
+    report = updateReport(font, previousReport, retest, tests)
+    writeReport(reportPath, manifest, report)
+    return report
+
+def updateReport(font, report, retest, tests):
+    """
+    Run the tests in retest on the glyphs in the
+    default layer of the font and merge the results
+    into a copy of report. Glyphs that are not in
+    report are tested with all tests. Glyphs that are
+    no longer in the layer are removed.
+    """
+    layer = font.layers.defaultLayer
+    glyphOrder = [glyphName for glyphName in font.glyphOrder if glyphName in layer]
+    glyphOrder += sorted(set(layer.keys()) - set(glyphOrder))
+    # the font level results may be from
+    # before the font was changed.
+    for testIdentifier in tests:
+        testData = testRegistry[testIdentifier]
+        if testData["level"] == "font":
+            layer.destroyRepresentation(testData["representationName"])
+    updated = {}
+    for glyphName in getComponentGraph(layer).orderGlyphNames(glyphOrder):
+        glyphTests = retest.get(glyphName)
+        if glyphName not in report:
+            glyphTests = tests
+        elif glyphTests is None:
+            updated[glyphName] = report[glyphName]
+            continue
+        glyph = layer[glyphName]
+        if set(glyphTests) != set(tests):
+            # these tests are being run because something
+            # other than the glyph changed, so the glyph
+            # may still have the old results.
+            _destroyTestRepresentations(glyph, glyphTests)
+        glyphReport = testGlyph(glyph, tests=glyphTests)
+        if glyphName in report and set(glyphTests) != set(tests):
+            merged = dict(report[glyphName])
+            merged.update(glyphReport)
+            glyphReport = merged
+        updated[glyphName] = glyphReport
+    return {name : updated[name] for name in glyphOrder}
+
+contourLevels = ("contour", "segment", "point")
+
+def _destroyTestRepresentations(glyph, tests):
+    for testIdentifier in tests:
+        testData = testRegistry[testIdentifier]
+        representationName = testData["representationName"]
+        if testData["level"] == "font":
+            # these are destroyed once in updateReport.
+            continue
+        elif testData["level"] in contourLevels:
+            for contour in glyph:
+                contour.destroyRepresentation(representationName)
+        else:
+            glyph.destroyRepresentation(representationName)
+
+# --------
+# Manifest
+# --------
+
+def makeManifest(font):
+    """
+    Make a manifest for the default layer of the font.
+
+    Data structure:
+
+        {
+            version : number
+            fontInfo : hash
+            glyphs : {
+                glyphName : hash
+            }
+            components : {
+                glyphName : [baseGlyphName, ...]
+            }
+        }
+    """
+    layer = font.layers.defaultLayer
+    glyphSet = layer._glyphSet
+    glyphs = {}
+    for glyphName in layer.keys():
+        glyphs[glyphName] = hashData(glyphSet.getGLIF(glyphName))
+    components = {}
+    for baseGlyphName, composites in layer.componentReferences.items():
+        for glyphName in composites:
+            if glyphName not in components:
+                components[glyphName] = []
+            components[glyphName].append(baseGlyphName)
+    for baseGlyphNames in components.values():
+        baseGlyphNames.sort()
+    return dict(
+        version=manifestFormatVersion,
+        fontInfo=hashFontInfo(font),
+        glyphs=glyphs,
+        components=components
+    )
+
+def getGlyphsToRetest(previousManifest, manifest, tests):
+    """
+    Compare two manifests and get the tests that
+    need to be run for each glyph.
+
+    Data structure:
+
+        {
+            glyphName : [testIdentifier, ...]
+        }
+
+    Glyphs that don't need to be retested are
+    not in the dictionary.
+    """
+    glyphs = manifest["glyphs"]
+    if previousManifest is None or previousManifest.get("version") != manifestFormatVersion:
+        return {glyphName : list(tests) for glyphName in glyphs}
+    previousGlyphs = previousManifest["glyphs"]
+    changed = set()
+    for glyphName, glyphHash in glyphs.items():
+        if previousGlyphs.get(glyphName) != glyphHash:
+            changed.add(glyphName)
+    removed = set(previousGlyphs) - set(glyphs)
+    retest = {glyphName : set(tests) for glyphName in changed}
+
+    def addTests(glyphNames, dependency):
+        dependentTests = [
+            testIdentifier
+            for testIdentifier in tests
+            if dependency in testRegistry[testIdentifier]["dependencies"]
+        ]
+        if not dependentTests:
+            return
+        for glyphName in glyphNames:
+            if glyphName not in glyphs:
+                continue
+            if glyphName not in retest:
+                retest[glyphName] = set()
+            retest[glyphName].update(dependentTests)
+
+    # composites of changed glyphs
+    composites = {}
+    for components in (previousManifest["components"], manifest["components"]):
+        for glyphName, baseGlyphNames in components.items():
+            for baseGlyphName in baseGlyphNames:
+                if baseGlyphName not in composites:
+                    composites[baseGlyphName] = set()
+                composites[baseGlyphName].add(glyphName)
+    dependents = set()
+    pending = list(changed | removed)
+    while pending:
+        glyphName = pending.pop()
+        for composite in composites.get(glyphName, ()):
+            if composite in dependents:
+                continue
+            dependents.add(composite)
+            pending.append(composite)
+    addTests(dependents, "componentBases")
+    # font info
+    if previousManifest["fontInfo"] != manifest["fontInfo"]:
+        addTests(glyphs, "fontInfo")
+    # other glyphs
+    if changed or removed:
+        addTests(glyphs, "layerGlyphs")
+    return {glyphName : sorted(glyphTests) for glyphName, glyphTests in retest.items()}
+
+def hashFontInfo(font):
+    fontInfoPath = os.path.join(font.path, "fontinfo.plist")
+    if not os.path.exists(fontInfoPath):
+        return None
+    with open(fontInfoPath, "rb") as f:
+        return hashData(f.read())
+
+def hashData(data):
+    return hashlib.sha1(data).hexdigest()
+
+# -------
+# Storage
+# -------
+
+def _getManifestPath(reportPath):
+    return reportPath + ".manifest.json"
+
+def readReport(reportPath):
+    manifestPath = _getManifestPath(reportPath)
+    if not os.path.exists(reportPath) or not os.path.exists(manifestPath):
+        return None, {}
+    try:
+        with open(manifestPath, "r") as f:
+            manifest = json.load(f)
+        with open(reportPath, "r") as f:
+            report = _decodeReportValue(json.load(f))
+    except (ValueError, KeyError, TypeError):
+        return None, {}
+    if not isinstance(report, dict):
+        return None, {}
+    return manifest, report
+
+def writeReport(reportPath, manifest, report):
+    with open(reportPath, "w") as f:
+        json.dump(_encodeReportValue(report), f)
+    with open(_getManifestPath(reportPath), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+# The test results contain tuples, sets and dictionaries
+# with keys that aren't strings. These are stored as
+# tagged JSON objects:
+#
+#    {"__tuple__" : [item, ...]}
+#    {"__set__" : [item, ...]}
+#    {"__dict__" : [[key, value], ...]}
+
+def _encodeReportValue(value):
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value.keys()):
+            return {key : _encodeReportValue(item) for key, item in value.items()}
+        return {
+            "__dict__" : [
+                [_encodeReportValue(key), _encodeReportValue(item)]
+                for key, item in value.items()
+            ]
+        }
+    if isinstance(value, tuple):
+        return {"__tuple__" : [_encodeReportValue(item) for item in value]}
+    if isinstance(value, (set, frozenset)):
+        return {"__set__" : [_encodeReportValue(item) for item in sorted(value, key=repr)]}
+    if isinstance(value, list):
+        return [_encodeReportValue(item) for item in value]
+    return value
+
+def _decodeReportValue(value):
+    if isinstance(value, list):
+        return [_decodeReportValue(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if len(value) == 1:
+        if "__tuple__" in value:
+            return tuple(_decodeReportValue(item) for item in value["__tuple__"])
+        if "__set__" in value:
+            return set(_decodeReportValue(item) for item in value["__set__"])
+        if "__dict__" in value:
+            return {
+                _decodeReportValue(key) : _decodeReportValue(item)
+                for key, item in value["__dict__"]
+            }
+    return {key : _decodeReportValue(item) for key, item in value.items()}
@@ -0,0 +1,219 @@
+"""
+Issue records for reports.
+
+A report from testGlyph, testLayer or testFont is a
+dictionary with keys like "contour3: crossedHandles" and
+values that are specific to each test. The functions here
+turn a report into Issue records so that exporters and
+viewers can iterate over the issues without parsing the
+keys again.
+
+IssueCollection stores the issues of a whole font in
+parallel arrays. The glyph names, layer names and test
+identifiers are stored once in string tables and the
+coordinates are stored in one flat array of floats. Issue
+objects are only made when the collection is iterated.
+"""
+
+from array import array
+from .tests.registry import testRegistry
+from .tests.manifest import (
+    testSeverities,
+    getTestSeverity
+)
+from .scripting import purgeGlyphReport
+
+
+class Issue(object):
+
+    __slots__ = (
+        "glyph",
+        "layer",
+        "test",
+        "level",
+        "contour",
+        "severity",
+        "coordinates",
+        "data"
+    )
+
+    def __init__(self, glyph=None, layer=None, test=None, level=None, contour=None, severity=None, coordinates=(), data=None):
+        self.glyph = glyph
+        self.layer = layer
+        self.test = test
+        self.level = level
+        self.contour = contour
+        self.severity = severity
+        self.coordinates = coordinates
+        self.data = data
+
+    def __repr__(self):
+        contour = ""
+        if self.contour is not None:
+            contour = " contour %d" % self.contour
+        return "<Issue %s %s%s>" % (self.glyph, self.test, contour)
+
+    def __eq__(self, other):
+        if not isinstance(other, Issue):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name)
+            for name in self.__slots__
+        )
+
+
+def makeGlyphIssues(glyphName, glyphReport, layerName=None):
+    """
+    Make a list of Issue records from a glyph report.
+    Tests that didn't find anything are skipped.
+    """
+    issues = []
+    for key, value in purgeGlyphReport(glyphReport).items():
+        contourIndex = None
+        testIdentifier = key
+        if key.startswith("contour"):
+            contourTitle, testIdentifier = key.split(": ", 1)
+            contourIndex = int(contourTitle[len("contour"):])
+        testData = testRegistry.get(testIdentifier, {})
+        issues.append(
+            Issue(
+                glyph=glyphName,
+                layer=layerName,
+                test=testIdentifier,
+                level=testData.get("level"),
+                contour=contourIndex,
+                severity=getTestSeverity(testIdentifier),
+                coordinates=tuple(_extractCoordinates(value)),
+                data=value
+            )
+        )
+    return issues
+
+def _extractCoordinates(value):
+    """
+    Find the (x, y) pairs in a test value. Flat
+    four number tuples are treated as bounds and
+    give their center.
+    """
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _extractCoordinates(item)
+    elif isinstance(value, (tuple, list, set, frozenset)):
+        if isinstance(value, tuple) and _isNumbers(value):
+            if len(value) == 2:
+                yield (float(value[0]), float(value[1]))
+                return
+            elif len(value) == 4:
+                xMin, yMin, xMax, yMax = value
+                yield ((xMin + xMax) / 2, (yMin + yMax) / 2)
+                return
+        for item in value:
+            yield from _extractCoordinates(item)
+
+def _isNumbers(value):
+    return all(
+        isinstance(item, (int, float)) and not isinstance(item, bool)
+        for item in value
+    )
+
+
+class IssueCollection(object):
+
+    """
+    An array backed collection of issues.
+    """
+
+    def __init__(self):
+        self._strings = []
+        self._stringIndexes = {}
+        self._glyphs = array("I")
+        self._layers = array("I")
+        self._tests = array("I")
+        self._contours = array("i")
+        self._severities = array("B")
+        self._coordinateStarts = array("I", [0])
+        self._coordinates = array("d")
+        self._data = []
+
+    @classmethod
+    def fromReport(cls, report, layerName=None):
+        """
+        Make a collection from a report returned
+        by testLayer or testFont.
+        """
+        collection = cls()
+        for glyphName, glyphReport in report.items():
+            for issue in makeGlyphIssues(glyphName, glyphReport, layerName):
+                collection.append(issue)
+        return collection
+
+    def _getStringIndex(self, string):
+        index = self._stringIndexes.get(string)
+        if index is None:
+            index = self._stringIndexes[string] = len(self._strings)
+            self._strings.append(string)
+        return index
+
+    def append(self, issue):
+        self._glyphs.append(self._getStringIndex(issue.glyph))
+        self._layers.append(self._getStringIndex(issue.layer))
+        self._tests.append(self._getStringIndex(issue.test))
+        if issue.contour is None:
+            self._contours.append(-1)
+        else:
+            self._contours.append(issue.contour)
+        self._severities.append(testSeverities.index(issue.severity))
+        for x, y in issue.coordinates:
+            self._coordinates.append(x)
+            self._coordinates.append(y)
+        self._coordinateStarts.append(len(self._coordinates))
+        self._data.append(issue.data)
+
+    def __len__(self):
+        return len(self._glyphs)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Issue index out of range.")
+        strings = self._strings
+        test = strings[self._tests[index]]
+        contour = self._contours[index]
+        if contour == -1:
+            contour = None
+        start = self._coordinateStarts[index]
+        end = self._coordinateStarts[index + 1]
+        coordinates = self._coordinates[start:end]
+        return Issue(
+            glyph=strings[self._glyphs[index]],
+            layer=strings[self._layers[index]],
+            test=test,
+            level=testRegistry.get(test, {}).get("level"),
+            contour=contour,
+            severity=testSeverities[self._severities[index]],
+            coordinates=tuple(zip(coordinates[0::2], coordinates[1::2])),
+            data=self._data[index]
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def glyphNames(self):
+        """
+        Get the names of the glyphs that have
+        issues, in the order they were added.
+        """
+        strings = self._strings
+        return list(dict.fromkeys(strings[index] for index in self._glyphs))
+
+    def issuesForGlyph(self, glyphName):
+        index = self._stringIndexes.get(glyphName)
+        if index is None:
+            return []
+        return [
+            self[issueIndex]
+            for issueIndex, glyphIndex in enumerate(self._glyphs)
+            if glyphIndex == index
+        ]
@@ -0,0 +1,225 @@
+"""
+Estimate the health of a font from a sample of its glyphs.
+
+The glyphs are divided into strata, either by the Unicode
+block of their first code point or by the part of their
+name before the first period or underscore. One glyph from
+every stratum is tested first, so that small strata are
+not left out, and the rest of the sample is drawn from the
+strata in proportion to their size. The
+issue rate of each test is estimated with the stratified
+estimator:
+
+    rate = sum(W * p)
+
+where W is the share of the glyphs that are in a stratum
+and p is the rate of glyphs with issues in the sample from
+that stratum. The variance includes the finite population
+correction, so testing every glyph in a stratum leaves no
+uncertainty for that stratum. p is adjusted to
+(x + 1) / (n + 2), where x is the number of glyphs with
+issues, so that small samples without any issues still
+get an interval:
+
+    variance = sum(W ** 2 * (1 - n / N) * pAdjusted * (1 - pAdjusted) / n)
+
+The confidence interval is the normal approximation and is
+clipped to 0 to 1. Strata that were not reached before the
+time budget ran out, or that got no samples because the
+sample is smaller than the number of strata, are left out
+of the estimate. They are listed in the result along with
+the share of the glyphs that the estimate covers.
+"""
+
+import time
+import random
+from fontTools import unicodedata
+from .scripting import (
+    registeredTests,
+    testGlyph,
+    summarizeFontReport
+)
+
+defaultSampleSize = 400
+
+# z values for the supported confidence levels
+_zValues = {
+    0.9 : 1.645,
+    0.95 : 1.96,
+    0.99 : 2.576
+}
+
+def testFontSample(
+        font,
+        tests=None,
+        ignoreOverlap=False,
+        sampleSize=None,
+        timeBudget=None,
+        stratifyBy="unicodeBlock",
+        confidence=0.95,
+        seed=None
+    ):
+    layer = font.defaultLayer
+    return testLayerSample(
+        layer,
+        tests=tests,
+        ignoreOverlap=ignoreOverlap,
+        sampleSize=sampleSize,
+        timeBudget=timeBudget,
+        stratifyBy=stratifyBy,
+        confidence=confidence,
+        seed=seed
+    )
+
+def testLayerSample(
+        layer,
+        tests=None,
+        ignoreOverlap=False,
+        sampleSize=None,
+        timeBudget=None,
+        stratifyBy="unicodeBlock",
+        confidence=0.95,
+        seed=None
+    ):
+    if tests is None:
+        tests = registeredTests().keys()
+    tests = sorted(tests)
+    if confidence not in _zValues:
+        raise ValueError("confidence must be one of %s." % ", ".join(str(value) for value in sorted(_zValues)))
+    if sampleSize is None and timeBudget is None:
+        sampleSize = defaultSampleSize
+    strata = stratifyGlyphs(layer, stratifyBy)
+    coverStrata = sampleSize is None or sampleSize >= len(strata)
+    order = _makeSampleOrder(strata, random.Random(seed), coverStrata)
+    if sampleSize is not None:
+        order = order[:sampleSize]
+    # test the sample
+    sampled = {stratum : [] for stratum in strata}
+    start = time.perf_counter()
+    for index, (stratum, glyphName) in enumerate(order):
+        # at least one glyph is always tested.
+        if index and timeBudget is not None and time.perf_counter() - start > timeBudget:
+            break
+        glyphReport = testGlyph(layer[glyphName], tests=tests, ignoreOverlap=ignoreOverlap)
+        glyphSummary = summarizeFontReport({glyphName : glyphReport}).get(glyphName, {})
+        sampled[stratum].append(set(glyphSummary.keys()))
+    elapsed = time.perf_counter() - start
+    # estimate
+    z = _zValues[confidence]
+    glyphCount = sum(len(glyphNames) for glyphNames in strata.values())
+    coveredCount = sum(
+        len(strata[stratum])
+        for stratum, results in sampled.items()
+        if results
+    )
+    testEstimates = {}
+    for testIdentifier in tests:
+        rate = 0
+        variance = 0
+        for stratum, results in sampled.items():
+            n = len(results)
+            if not n:
+                continue
+            N = len(strata[stratum])
+            W = N / coveredCount
+            x = sum(1 for failedTests in results if testIdentifier in failedTests)
+            rate += W * x / n
+            pAdjusted = (x + 1) / (n + 2)
+            variance += W ** 2 * (1 - n / N) * pAdjusted * (1 - pAdjusted) / n
+        margin = z * variance ** 0.5
+        testEstimates[testIdentifier] = dict(
+            rate=rate,
+            low=max(0, rate - margin),
+            high=min(1, rate + margin)
+        )
+    return dict(
+        glyphCount=glyphCount,
+        sampleCount=sum(len(results) for results in sampled.values()),
+        coverage=coveredCount / glyphCount if glyphCount else 0,
+        confidence=confidence,
+        elapsed=elapsed,
+        tests=testEstimates,
+        unsampledStrata=sorted(
+            stratum
+            for stratum, results in sampled.items()
+            if not results
+        ),
+        strata={
+            stratum : dict(
+                glyphCount=len(strata[stratum]),
+                sampleCount=len(sampled[stratum])
+            )
+            for stratum in sorted(strata)
+        }
+    )
+
+# ------
+# Strata
+# ------
+
+def stratifyGlyphs(layer, stratifyBy="unicodeBlock"):
+    """
+    Divide the glyphs in the layer into strata.
+
+    Data structure:
+
+        {
+            stratum : [glyphName, ...]
+        }
+
+    stratifyBy may be "unicodeBlock" or "namePrefix".
+    Unencoded glyphs are put in the "Unencoded" stratum
+    when stratifying by Unicode block.
+    """
+    if stratifyBy == "unicodeBlock":
+        getStratum = _getUnicodeBlockStratum
+    elif stratifyBy == "namePrefix":
+        getStratum = _getNamePrefixStratum
+    else:
+        raise ValueError("Unknown stratifyBy value: %r" % stratifyBy)
+    if hasattr(layer, "naked"):
+        layer = layer.naked()
+    strata = {}
+    unicodeData = layer.unicodeData
+    for glyphName in sorted(layer.keys()):
+        stratum = getStratum(glyphName, unicodeData)
+        if stratum not in strata:
+            strata[stratum] = []
+        strata[stratum].append(glyphName)
+    return strata
+
+def _getUnicodeBlockStratum(glyphName, unicodeData):
+    value = unicodeData.unicodeForGlyphName(glyphName)
+    if value is None:
+        return "Unencoded"
+    return unicodedata.block(chr(value))
+
+def _getNamePrefixStratum(glyphName, unicodeData):
+    prefix = glyphName.split(".", 1)[0].split("_", 1)[0]
+    if not prefix:
+        prefix = glyphName
+    return prefix
+
+def _makeSampleOrder(strata, randomGenerator, coverStrata=True):
+    """
+    Order all glyphs so that any number of glyphs
+    taken from the start of the order is spread over
+    the strata in proportion to their size. If
+    coverStrata is True, one glyph from every stratum
+    is put at the start of the order.
+    """
+    first = []
+    order = []
+    for stratum, glyphNames in strata.items():
+        glyphNames = list(glyphNames)
+        randomGenerator.shuffle(glyphNames)
+        N = len(glyphNames)
+        for index, glyphName in enumerate(glyphNames):
+            position = (index + randomGenerator.random()) / N
+            if coverStrata and index == 0:
+                first.append((position, stratum, glyphName))
+            else:
+                order.append((position, stratum, glyphName))
+    first.sort()
+    order.sort()
+    return [(stratum, glyphName) for (position, stratum, glyphName) in first + order]
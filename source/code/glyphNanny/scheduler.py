@@ -0,0 +1,68 @@
+"""
+Time budgeted updates for the glyph editor.
+
+Work is queued as jobs with a cost rank. The cheapest
+jobs are run first and jobs are run until the frame
+budget has been spent. The rest of the jobs are run in
+slices during idle time. Queueing new jobs replaces the
+jobs that haven't been run yet.
+"""
+
+import time
+from PyObjCTools.AppHelper import callLater
+
+defaultFrameBudget = 0.008
+defaultIdleBudget = 0.02
+
+
+class JobScheduler(object):
+
+    def __init__(self, frameBudget=defaultFrameBudget, idleBudget=defaultIdleBudget):
+        self.frameBudget = frameBudget
+        self.idleBudget = idleBudget
+        self._jobs = []
+        self._idleScheduled = False
+
+    def schedule(self, jobs):
+        """
+        Replace the pending jobs with jobs and run as
+        many as possible within the frame budget.
+
+        jobs is a list of (cost, callable) pairs. The
+        order of jobs with the same cost is kept.
+        """
+        self._jobs = [job for cost, job in sorted(jobs, key=lambda item: item[0])]
+        self._jobs.reverse()
+        self._run(self.frameBudget)
+        if self._jobs:
+            self._scheduleIdle()
+
+    def cancel(self):
+        """
+        Drop all pending jobs.
+        """
+        self._jobs = []
+
+    def hasPendingJobs(self):
+        return bool(self._jobs)
+
+    def _run(self, budget):
+        start = time.perf_counter()
+        jobs = self._jobs
+        while jobs:
+            job = jobs.pop()
+            job()
+            if time.perf_counter() - start >= budget:
+                break
+
+    def _scheduleIdle(self):
+        if self._idleScheduled:
+            return
+        self._idleScheduled = True
+        callLater(0, self._runIdle)
+
+    def _runIdle(self):
+        self._idleScheduled = False
+        self._run(self.idleBudget)
+        if self._jobs:
+            self._scheduleIdle()
@@ -1,5 +1,13 @@
-import re
-from .tests.registry import testRegistry
+import os
+from .tests import loadTests
+from .tests.registry import testRegistry, BatchCache
+from .tests.manifest import getTestCost
+from .tests.similarity import findNearDuplicateGlyphs
+from .tests.compatibility import findIncompatibleGlyphs
+from .tests.indexes import getComponentGraph
+from .tests.overlap import getOverlapRemovedGlyph
+
+loadTests()
 
 def registeredTests():
     registered = {}
@@ -16,7 +24,9 @@ def testFont(
         font,
         tests=None,
         ignoreOverlap=False,
-        progressBar=None
+        progressBar=None,
+        cachePolicy="keep",
+        cacheSize=None
     ):
     if tests is None:
         tests = registeredTests().keys()
@@ -25,34 +35,72 @@ def testFont(
         layer,
         tests=tests,
         ignoreOverlap=ignoreOverlap,
-        progressBar=progressBar
+        progressBar=progressBar,
+        cachePolicy=cachePolicy,
+        cacheSize=cacheSize
     )
 
 def testLayer(
         layer,
         tests=None,
         ignoreOverlap=False,
-        progressBar=None
+        progressBar=None,
+        cachePolicy="keep",
+        cacheSize=None
     ):
     if tests is None:
         tests = registeredTests().keys()
-    font = layer.font
-    if font is not None:
-        glyphOrder = font.glyphOrder
-    else:
-        glyphOrder = sorted(layer.keys())
+    defconLayer = _getDefconLayer(layer)
+    testingOrder, glyphOrder = _getTestingOrder(layer)
+    batchCache = BatchCache(cachePolicy, cacheSize)
     report = {}
-    for name in glyphOrder:
+    for name in testingOrder:
         if progressBar is not None:
             progressBar.update("Analyzing %s..." % name)
         glyph = layer[name]
-        glyphReport = testGlyph(glyph, tests=tests)
+        glyphReport = testGlyph(glyph, tests=tests, ignoreOverlap=ignoreOverlap)
         report[name] = glyphReport
+        batchCache.glyphTested(defconLayer[name])
+    batchCache.finish(defconLayer)
+    report = {name : report[name] for name in glyphOrder if name in report}
     return report
 
-def testGlyph(glyph, tests=None):
+def _getTestingOrder(layer):
+    """
+    Get the order the glyphs should be tested in and
+    the order the glyphs should be reported in.
+    """
+    font = layer.font
+    if font is not None:
+        glyphOrder = font.glyphOrder
+    else:
+        glyphOrder = sorted(layer.keys())
+    glyphOrder = [name for name in glyphOrder if name in layer]
+    # test base glyphs before the composites that
+    # use them so that their data is ready to be
+    # shared when the composites are tested.
+    componentGraph = getComponentGraph(_getDefconLayer(layer))
+    testingOrder = componentGraph.orderGlyphNames(glyphOrder)
+    return testingOrder, glyphOrder
+
+def _getDefconLayer(layer):
+    if hasattr(layer, "naked"):
+        layer = layer.naked()
+    return layer
+
+def _getGlyphLayer(glyph):
+    if hasattr(glyph, "naked"):
+        glyph = glyph.naked()
+    return glyph.layer
+
+def testGlyph(glyph, tests=None, ignoreOverlap=False):
     if tests is None:
         tests = registeredTests().keys()
+    layer = _getGlyphLayer(glyph)
+    if ignoreOverlap:
+        if hasattr(glyph, "naked"):
+            glyph = glyph.naked()
+        glyph = getOverlapRemovedGlyph(glyph)
     objectLevels = {}
     for testIdentifier in sorted(tests):
         testData = testRegistry[testIdentifier]
@@ -70,16 +118,141 @@ def testGlyph(glyph, tests=None):
       + objectLevels.get("segment", [])
       + objectLevels.get("point", [])
     )
+    fontLevelTests = objectLevels.get("font", [])
     stub = "GlyphNanny."
     report = {}
+    # font level tests run once per layer
+    # and are cached by the layer.
+    for testIdentifier in fontLevelTests:
+        fontReport = layer.getRepresentation(stub + testIdentifier)
+        report[testIdentifier] = fontReport.get(glyph.name, [])
     for testIdentifier in glyphLevelTests:
         report[testIdentifier] = glyph.getRepresentation(stub + testIdentifier)
-    for contourIndex, contour in enumerate(glyph.contours):
+    for contourIndex, contour in enumerate(glyph):
         for testIdentifier in contourLevelTests:
             key = f"contour{contourIndex}: {testIdentifier}"
             report[key] = contour.getRepresentation(stub + testIdentifier)
     return report
 
+# ------
+# Triage
+# ------
+
+# these stop at the first issue in each glyph.
+# the tests are run from cheapest to most
+# expensive so that glyphs with cheap issues
+# never run the expensive tests.
+
+def testFontForFirstIssues(
+        font,
+        tests=None,
+        ignoreOverlap=False,
+        progressBar=None
+    ):
+    layer = font.defaultLayer
+    return testLayerForFirstIssues(
+        layer,
+        tests=tests,
+        ignoreOverlap=ignoreOverlap,
+        progressBar=progressBar
+    )
+
+def testLayerForFirstIssues(
+        layer,
+        tests=None,
+        ignoreOverlap=False,
+        progressBar=None
+    ):
+    if tests is None:
+        tests = registeredTests().keys()
+    tests = _sortTestsByCost(tests)
+    testingOrder, glyphOrder = _getTestingOrder(layer)
+    report = {}
+    for name in testingOrder:
+        if progressBar is not None:
+            progressBar.update("Analyzing %s..." % name)
+        report[name] = _findFirstIssue(layer[name], tests, ignoreOverlap)
+    return {name : report[name] for name in glyphOrder}
+
+def testGlyphForFirstIssue(glyph, tests=None, ignoreOverlap=False):
+    if tests is None:
+        tests = registeredTests().keys()
+    return _findFirstIssue(glyph, _sortTestsByCost(tests), ignoreOverlap)
+
+def glyphHasIssue(glyph, tests=None, ignoreOverlap=False):
+    return testGlyphForFirstIssue(glyph, tests=tests, ignoreOverlap=ignoreOverlap) is not None
+
+_contourLevels = ("contour", "segment", "point")
+
+def _sortTestsByCost(tests):
+    return sorted(
+        tests,
+        key=lambda testIdentifier: (getTestCost(testIdentifier), testIdentifier)
+    )
+
+def _findFirstIssue(glyph, tests, ignoreOverlap):
+    layer = _getGlyphLayer(glyph)
+    if ignoreOverlap:
+        if hasattr(glyph, "naked"):
+            glyph = glyph.naked()
+        glyph = getOverlapRemovedGlyph(glyph)
+    stub = "GlyphNanny."
+    for testIdentifier in tests:
+        level = testRegistry[testIdentifier]["level"]
+        if level == "font":
+            fontReport = layer.getRepresentation(stub + testIdentifier)
+            if fontReport.get(glyph.name):
+                return testIdentifier
+        elif level in _contourLevels:
+            for contourIndex, contour in enumerate(glyph):
+                key = f"contour{contourIndex}: {testIdentifier}"
+                value = contour.getRepresentation(stub + testIdentifier)
+                if purgeGlyphReport({key : value}):
+                    return key
+        else:
+            value = glyph.getRepresentation(stub + testIdentifier)
+            if purgeGlyphReport({testIdentifier : value}):
+                return testIdentifier
+    return None
+
+def testFontForNearDuplicateGlyphs(font, threshold=0.85):
+    if hasattr(font, "naked"):
+        font = font.naked()
+    layer = font.layers.defaultLayer
+    return findNearDuplicateGlyphs(
+        layer,
+        glyphNames=font.glyphOrder,
+        threshold=threshold
+    )
+
+def testFontsForCompatibility(fonts, glyphNames=None):
+    layers = []
+    layerNames = []
+    for index, font in enumerate(fonts):
+        if hasattr(font, "naked"):
+            font = font.naked()
+        layers.append(font.layers.defaultLayer)
+        if font.path is not None:
+            layerNames.append(os.path.basename(font.path))
+        else:
+            layerNames.append("Font %d" % (index + 1))
+    if glyphNames is None:
+        allGlyphNames = set()
+        for layer in layers:
+            allGlyphNames.update(layer.keys())
+        glyphNames = []
+        for font in fonts:
+            for glyphName in font.glyphOrder:
+                if glyphName in allGlyphNames:
+                    allGlyphNames.remove(glyphName)
+                    glyphNames.append(glyphName)
+        glyphNames += sorted(allGlyphNames)
+    return findIncompatibleGlyphs(
+        layers,
+        glyphNames=glyphNames,
+        layerNames=layerNames
+    )
+
 # --------------
 # Report Purging
 # --------------
@@ -102,6 +275,28 @@ def purgeDict(d):
         purged[k] = v
     return purged
 
+# ---------
+# Summaries
+# ---------
+
+# {glyphName : {testIdentifier : issueCount}}
+# glyphs without issues are not included.
+
+def summarizeFontReport(report):
+    summary = {}
+    for glyphName, glyphReport in report.items():
+        glyphSummary = {}
+        for key, value in purgeGlyphReport(glyphReport).items():
+            testIdentifier = key.split(": ", 1)[-1]
+            if isinstance(value, (list, tuple)):
+                count = len(value)
+            else:
+                count = 1
+            glyphSummary[testIdentifier] = glyphSummary.get(testIdentifier, 0) + count
+        if glyphSummary:
+            summary[glyphName] = glyphSummary
+    return summary
+
 # ----------
 # Formatting
 # ----------
@@ -121,34 +316,22 @@ def formatLayerReport(report):
         lines.append("\n")
     return "\n".join(lines).strip()
 
-contourTitle_RE = re.compile(r"contour([\d])+:")
-
 def formatGlyphReport(report):
-    report = purgeGlyphReport(report)
-    notContours = {}
-    contours = {}
-    for key, value in report.items():
-        m = contourTitle_RE.match(key)
-        if m:
-            contourIndex = m.group(1)
-            if contourIndex not in contours:
-                contours[contourIndex] = {}
-            key = key.split(":", 1)[-1].strip()
-            contours[contourIndex][key] = value
-        else:
-            notContours[key] = value
+    from .issues import makeGlyphIssues
+    issues = makeGlyphIssues(None, report)
+    glyphIssues = [issue for issue in issues if issue.contour is None]
+    contourIssues = [issue for issue in issues if issue.contour is not None]
     lines = []
-    for key, value in sorted(notContours.items()):
-        title = testRegistry[key]["title"]
+    for issue in sorted(glyphIssues, key=lambda issue: issue.test):
+        title = testRegistry[issue.test]["title"]
         lines.append("## " + title)
-        lines.append(formatValue(value))
+        lines.append(formatValue(issue.data))
+        lines.append("")
+    for issue in sorted(contourIssues, key=lambda issue: (issue.contour, issue.test)):
+        title = testRegistry[issue.test]["title"]
+        lines.append("## {title}: Contour {contourIndex}".format(title=title, contourIndex=issue.contour))
+        lines.append(formatValue(issue.data))
         lines.append("")
-    for contourIndex, contourReport in sorted(contours.items()):
-        for key, value in sorted(notContours.items()):
-            title = testRegistry[key]["title"]
-            lines.append("## {title}: Contour {contourIndex}".format(title=title, contourIndex=contourIndex))
-            lines.append(formatValue(value))
-            lines.append("")
     return "\n".join(lines).strip()
 
 def formatValue(value):
@@ -1,8 +1,9 @@
 import ezui
-from .tests.registry import testRegistry
+from .tests.manifest import testManifest
 from . import defaults
 
 groups = [
+    ("font", "Font Tests"),
     ("glyphInfo", "Glyph Info Tests"),
     ("glyph", "Glyph Tests"),
     ("metrics", "Metrics Tests"),
@@ -10,9 +11,8 @@ groups = [
     ("segment", "Segment Tests"),
     ("point", "Point Tests")
 ]
-groupTitles = [title for (level, title) in groups]
 groupLevels = {}
-for testIdentifier, testData in testRegistry.items():
+for testIdentifier, testData in testManifest.items():
     level = testData["level"]
     if level not in groupLevels:
         groupLevels[level] = []
@@ -33,8 +33,9 @@ def makeTestsTableDescription():
         )
     ]
     tableItems = []
-    for i, (groupLevel, groupTests) in enumerate(groupLevels.items()):
-        groupTitle = groupTitles[i]
+    for groupLevel, groupTitle in groups:
+        if groupLevel not in groupLevels:
+            continue
         tableItems.append(
             groupTitle
         )
@@ -1,8 +1,28 @@
-# Import to trigger the registration
-# of the representation factories
-from . import glyphInfo
-from . import glyph
-from . import metrics
-from . import contour
-from . import segment
-from . import point
\ No newline at end of file
+_testsLoaded = False
+
+def loadTests():
+    """
+    Import the test modules. This registers the tests
+    and the representation factories. The modules are
+    only imported the first time this is called.
+    """
+    global _testsLoaded
+    if _testsLoaded:
+        return
+    from . import indexes
+    from . import font
+    from . import glyphInfo
+    from . import glyph
+    from . import metrics
+    from . import contour
+    from . import segment
+    from . import point
+    from . import similarity
+    from . import overlap
+    from . import compatibility
+    from .registry import testRegistry
+    from .manifest import testManifest
+    unregistered = sorted(set(testManifest) - set(testRegistry))
+    if unregistered:
+        raise ValueError("These tests are in the manifest but weren't registered: %s" % ", ".join(unregistered))
+    _testsLoaded = True
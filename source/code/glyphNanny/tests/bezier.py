@@ -0,0 +1,107 @@
+"""
+Bezier evaluation shared by the tests.
+
+The Bernstein weights for a set of t values are computed
+once and reused for every curve that is evaluated at the
+same t values. Arc length tables are cached per curve so
+that a segment that is measured by more than one test, or
+more than once by the same test, is only sampled once.
+"""
+
+import functools
+
+arcLengthTableSteps = 64
+
+# ----------
+# Evaluation
+# ----------
+
+@functools.lru_cache(maxsize=64)
+def getBernsteinWeights(ts):
+    """
+    Get the cubic Bernstein weights for the t values.
+
+    Data structure:
+
+        (
+            (w0, w1, w2, w3),
+            ...
+        )
+    """
+    weights = []
+    for t in ts:
+        mt = 1 - t
+        weights.append((
+            mt * mt * mt,
+            3 * mt * mt * t,
+            3 * mt * t * t,
+            t * t * t
+        ))
+    return tuple(weights)
+
+def evaluateCubics(curves, ts):
+    """
+    Evaluate each of the curves at each of the t values.
+
+    Data structure:
+
+        [
+            [(x, y), ...],
+            ...
+        ]
+
+    There is one list of points per curve.
+    """
+    weights = getBernsteinWeights(tuple(ts))
+    evaluated = []
+    for (x0, y0), (x1, y1), (x2, y2), (x3, y3) in curves:
+        evaluated.append([
+            (
+                w0 * x0 + w1 * x1 + w2 * x2 + w3 * x3,
+                w0 * y0 + w1 * y1 + w2 * y2 + w3 * y3
+            )
+            for w0, w1, w2, w3 in weights
+        ])
+    return evaluated
+
+def evaluateCubic(curve, ts):
+    """
+    Evaluate the curve at each of the t values.
+    """
+    return evaluateCubics([curve], ts)[0]
+
+# ----------
+# Arc Length
+# ----------
+
+_arcLengthTableTs = tuple(i / arcLengthTableSteps for i in range(arcLengthTableSteps + 1))
+
+@functools.lru_cache(maxsize=4096)
+def getCubicArcLengthTable(curve):
+    """
+    Get the arc length of the curve at evenly spaced
+    t values from 0 to 1.
+
+    Data structure:
+
+        (length, ...)
+
+    The curve must be a tuple of (x, y) tuples so
+    that it can be used as a cache key.
+    """
+    points = evaluateCubic(curve, _arcLengthTableTs)
+    table = [0.0]
+    length = 0.0
+    x1, y1 = points[0]
+    for x2, y2 in points[1:]:
+        length += ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
+        table.append(length)
+        x1, y1 = x2, y2
+    return tuple(table)
+
+def calculateCubicArcLength(curve):
+    """
+    Get the arc length of the curve.
+    """
+    curve = tuple(tuple(point) for point in curve)
+    return getCubicArcLengthTable(curve)[-1]
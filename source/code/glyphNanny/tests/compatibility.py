@@ -0,0 +1,179 @@
+"""
+Interpolation compatibility across fonts.
+
+Every glyph gets a structural fingerprint: a short digest
+of its contours, point types, components and anchors. The
+point coordinates are not part of the fingerprint, so the
+same glyph in compatible masters has the same fingerprint.
+The glyphs are compared across the fonts by fingerprint,
+which is one comparison per glyph per font. Only glyphs
+with fingerprints that differ from the reference font are
+compared in detail to find out what is incompatible.
+"""
+
+import hashlib
+import defcon
+
+_pointTypeCodes = {
+    "move" : "m",
+    "line" : "l",
+    "curve" : "c",
+    "qcurve" : "q",
+    None : "o"
+}
+
+# -----------
+# Fingerprint
+# -----------
+
+def getGlyphStructure(glyph):
+    """
+    Get the structure of the glyph.
+
+    Data structure:
+
+        {
+            contours : [pointTypes, ...]
+            components : [baseGlyphName, ...]
+            anchors : [anchorName, ...]
+        }
+
+    pointTypes is a string with one character
+    per point, starting at the start point.
+    """
+    contours = []
+    for contour in glyph:
+        contours.append("".join(_pointTypeCodes.get(point.segmentType, "?") for point in contour))
+    return dict(
+        contours=contours,
+        components=[component.baseGlyph for component in glyph.components],
+        anchors=[anchor.name for anchor in glyph.anchors]
+    )
+
+def structuralFingerprintFactory(glyph):
+    """
+    Get a digest of the glyph's structure.
+    """
+    structure = getGlyphStructure(glyph)
+    text = "|".join((
+        " ".join(structure["contours"]),
+        " ".join(structure["components"]),
+        " ".join(str(name) for name in structure["anchors"])
+    ))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=12).digest()
+
+defcon.registerRepresentationFactory(
+    cls=defcon.Glyph,
+    name="GlyphNanny.structuralFingerprint",
+    factory=structuralFingerprintFactory,
+    destructiveNotifications=[
+        "Glyph.ContoursChanged",
+        "Glyph.ComponentsChanged",
+        "Glyph.AnchorsChanged"
+    ]
+)
+
+# -------------
+# Compatibility
+# -------------
+
+def findIncompatibleGlyphs(layers, glyphNames=None, layerNames=None):
+    """
+    Compare the glyphs in the layers with the glyphs
+    in the first layer.
+
+    Data structure:
+
+        {
+            glyphName : [message, ...]
+        }
+
+    Compatible glyphs are not in the dictionary.
+    layerNames are used in the messages. If they
+    aren't given, the layers are numbered.
+    """
+    if layerNames is None:
+        layerNames = ["Font %d" % (index + 1) for index in range(len(layers))]
+    if glyphNames is None:
+        glyphNames = []
+        seen = set()
+        for layer in layers:
+            for glyphName in sorted(layer.keys()):
+                if glyphName not in seen:
+                    seen.add(glyphName)
+                    glyphNames.append(glyphName)
+    reference = layers[0]
+    referenceName = layerNames[0]
+    report = {}
+    for glyphName in glyphNames:
+        messages = []
+        if glyphName not in reference:
+            missing = [referenceName]
+            for layerName, layer in zip(layerNames[1:], layers[1:]):
+                if glyphName not in layer:
+                    missing.append(layerName)
+            messages.append("The glyph is missing from: %s." % ", ".join(missing))
+            report[glyphName] = messages
+            continue
+        referenceGlyph = reference[glyphName]
+        fingerprint = referenceGlyph.getRepresentation("GlyphNanny.structuralFingerprint")
+        referenceStructure = None
+        missing = []
+        for layerName, layer in zip(layerNames[1:], layers[1:]):
+            if glyphName not in layer:
+                missing.append(layerName)
+                continue
+            glyph = layer[glyphName]
+            if glyph.getRepresentation("GlyphNanny.structuralFingerprint") == fingerprint:
+                continue
+            # drill down
+            if referenceStructure is None:
+                referenceStructure = getGlyphStructure(referenceGlyph)
+            for message in compareGlyphStructures(referenceStructure, getGlyphStructure(glyph)):
+                messages.append("%s: %s" % (layerName, message))
+        if missing:
+            messages.insert(0, "The glyph is missing from: %s." % ", ".join(missing))
+        if messages:
+            report[glyphName] = messages
+    return report
+
+def compareGlyphStructures(reference, other):
+    """
+    Describe how other differs from reference.
+    """
+    messages = []
+    referenceContours = reference["contours"]
+    otherContours = other["contours"]
+    if len(referenceContours) != len(otherContours):
+        messages.append(
+            "%d contours instead of %d." % (len(otherContours), len(referenceContours))
+        )
+    else:
+        for contourIndex, (referenceTypes, otherTypes) in enumerate(zip(referenceContours, otherContours)):
+            if referenceTypes == otherTypes:
+                continue
+            if len(referenceTypes) != len(otherTypes):
+                messages.append(
+                    "Contour %d has %d points instead of %d."
+                    % (contourIndex, len(otherTypes), len(referenceTypes))
+                )
+            elif _isRotation(referenceTypes, otherTypes):
+                messages.append("Contour %d has a different start point." % contourIndex)
+            else:
+                messages.append("Contour %d has different segment types." % contourIndex)
+    referenceComponents = reference["components"]
+    otherComponents = other["components"]
+    if referenceComponents != otherComponents:
+        if sorted(referenceComponents) == sorted(otherComponents):
+            messages.append("The components are in a different order.")
+        else:
+            messages.append(
+                "The components are %s instead of %s."
+                % (" ".join(otherComponents) or "none", " ".join(referenceComponents) or "none")
+            )
+    if reference["anchors"] != other["anchors"]:
+        messages.append("The anchors are different.")
+    return messages
+
+def _isRotation(pointTypes1, pointTypes2):
+    return pointTypes2 in pointTypes1 + pointTypes1
@@ -0,0 +1,45 @@
+import defcon
+from . import registry
+
+# Font level tests are run once per layer and
+# return their results keyed by glyph name:
+#
+#    {
+#        glyphName : [message, ...]
+#    }
+#
+# Glyphs without issues are not in the dictionary.
+
+# Duplicate Unicodes
+
+def testDuplicateUnicodes(layer):
+    """
+    A Unicode value should appear only once per font.
+    """
+    report = {}
+    for uni, glyphNames in sorted(layer.unicodeData.items()):
+        glyphNames = sorted(set(glyphNames))
+        if len(glyphNames) < 2:
+            continue
+        for glyphName in glyphNames:
+            others = [other for other in glyphNames if other != glyphName]
+            if glyphName not in report:
+                report[glyphName] = []
+            report[glyphName].append("The Unicode for this glyph is also used by: %s." % " ".join(others))
+    return report
+
+registry.registerTest(
+    identifier="duplicateUnicodes",
+    level="font",
+    title="Duplicate Unicodes",
+    description="Unicode value is used by more than one glyph.",
+    testFunction=testDuplicateUnicodes,
+    defconClass=defcon.Layer,
+    destructiveNotifications=[
+        "Layer.GlyphAdded",
+        "Layer.GlyphDeleted",
+        "Layer.GlyphNameChanged",
+        "Layer.GlyphUnicodesChanged"
+    ],
+    dependencies=["layerGlyphs"]
+)
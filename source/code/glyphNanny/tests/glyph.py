@@ -1,5 +1,3 @@
-from fontPens.digestPointPen import DigestPointPen
-from fontTools.misc import arrayTools as ftArrayTools
 import defcon
 from .tools import (
     unwrapPoint,
@@ -21,24 +19,24 @@ def testStemWidths(glyph):
             vertical : [(x1, x2, [y1, y2, ...]), ...]
         }
     """
+    spatialIndex = glyph.getRepresentation("GlyphNanny.contourSpatialIndex")
     font = wrapFont(glyph.font)
-    layer = font.getLayer(glyph.layer.name)
-    glyph = layer[glyph.name]
+    glyph = wrapGlyph(glyph)
     hProblems = vProblems = None
     tolerance = 5
     # horizontal
     hStems = [_StemWrapper(v, tolerance) for v in font.info.postscriptStemSnapH]
     if hStems:
-        hProblems = _findStemProblems(glyph, hStems, "h")
+        hProblems = _findStemProblems(glyph, hStems, "h", spatialIndex)
     # vertical
     vStems = [_StemWrapper(v, tolerance) for v in font.info.postscriptStemSnapV]
     if vStems:
-        vProblems = _findStemProblems(glyph, vStems, "v")
+        vProblems = _findStemProblems(glyph, vStems, "v", spatialIndex)
     # report
     data = dict(horizontal=hProblems, vertical=vProblems)
     return data
 
-def _findStemProblems(glyph, targetStems, stemDirection):
+def _findStemProblems(glyph, targetStems, stemDirection, spatialIndex):
     stems = set()
     # h/v abstraction
     if stemDirection == "h":
@@ -56,7 +54,7 @@ def _findStemProblems(glyph, targetStems, stemDirection):
         True : [],
         False : []
     }
-    for contour in glyph:
+    for contourIndex, contour in enumerate(glyph):
         contourDirection = contour.clockwise
         bounds = contour.bounds
         lines = {}
@@ -97,11 +95,11 @@ def _findStemProblems(glyph, targetStems, stemDirection):
                         lines[angle][p] = []
                     lines[angle][p].append((s1, s2))
             previous = segment
-        contours[contourDirection].append((bounds, lines))
+        contours[contourDirection].append((bounds, lines, contourIndex))
     # single contours
     for clockwise, directionContours in contours.items():
         for contour in directionContours:
-            bounds, data = contour
+            bounds, data, contourIndex = contour
             for angle1, lineData1 in data.items():
                 for angle2, lineData2 in data.items():
                     if angle1 == angle2:
@@ -132,12 +130,16 @@ def _findStemProblems(glyph, targetStems, stemDirection):
                                         s = hit[2]
                                         stems.add((p1, p1 + w, s))
     # double contours to test
+    # only pair contours with overlapping bounds
+    counterContours = {
+        counterContour[2] : counterContour
+        for counterContour in contours[False]
+    }
     for clockwiseContour in contours[True]:
         clockwiseBounds = clockwiseContour[0]
-        for counterContour in contours[False]:
-            counterBounds = counterContour[0]
-            overlap = ftArrayTools.sectRect(clockwiseBounds, counterBounds)[0]
-            if not overlap:
+        for contourIndex in spatialIndex.query(clockwiseBounds):
+            counterContour = counterContours.get(contourIndex)
+            if counterContour is None:
                 continue
             clockwiseData = clockwiseContour[1]
             counterData = counterContour[1]
@@ -197,11 +199,62 @@ registry.registerTest(
     description="One or more stems do not match the registered values.",
     testFunction=testStemWidths,
     defconClass=defcon.Glyph,
-    destructiveNotifications=["Glyph.ContoursChanged"]
+    destructiveNotifications=["Glyph.ContoursChanged"],
+    dependencies=["fontInfo"]
 )
 
 # Duplicate Contours
 
+def contourHashFactory(contour):
+    """
+    Get a canonical form of the contour that doesn't
+    depend on the start point of closed contours.
+
+    The point sequence is rotated to its lexicographically
+    minimal rotation, so contours that only differ in
+    their start point produce the same value. The value
+    is the sequence itself rather than a hash of it so
+    that a hash collision can't make two different
+    contours look like duplicates.
+    """
+    sequence = [
+        (point.x, point.y, point.segmentType or "")
+        for point in contour
+    ]
+    if sequence and not contour.open:
+        rotation = _findMinimalRotation(sequence)
+        sequence = sequence[rotation:] + sequence[:rotation]
+    return (contour.open, tuple(sequence))
+
+def _findMinimalRotation(sequence):
+    # Booth's least rotation algorithm
+    keys = list(sequence)
+    keys += keys
+    length = len(keys)
+    failures = [-1] * length
+    rotation = 0
+    for j in range(1, length):
+        key = keys[j]
+        i = failures[j - rotation - 1]
+        while i != -1 and key != keys[rotation + i + 1]:
+            if key < keys[rotation + i + 1]:
+                rotation = j - i - 1
+            i = failures[i]
+        if key != keys[rotation + i + 1]:
+            if key < keys[rotation]:
+                rotation = j
+            failures[j - rotation] = -1
+        else:
+            failures[j - rotation] = i + 1
+    return rotation % len(sequence)
+
+defcon.registerRepresentationFactory(
+    cls=defcon.Contour,
+    name="GlyphNanny.contourHash",
+    factory=contourHashFactory,
+    destructiveNotifications=["Contour.PointsChanged"]
+)
+
 def testDuplicateContours(glyph):
     """
     Contours shouldn't be duplicated on each other.
@@ -213,22 +266,17 @@ def testDuplicateContours(glyph):
             ...
         ]
     """
-    glyph = wrapGlyph(glyph)
     contours = {}
     for index, contour in enumerate(glyph):
-        contour = contour.copy()
-        if not contour.open:
-            contour.autoStartSegment()
-        pen = DigestPointPen()
-        contour.drawPoints(pen)
-        digest = pen.getDigest()
-        if digest not in contours:
-            contours[digest] = []
-        contours[digest].append(index)
+        contourHash = contour.getRepresentation("GlyphNanny.contourHash")
+        if contourHash not in contours:
+            contours[contourHash] = []
+        contours[contourHash].append(index)
     duplicateContours = []
-    for digest, indexes in contours.items():
+    for contourHash, indexes in contours.items():
         if len(indexes) > 1:
-            duplicateContours.append((indexes[0], contour.bounds))
+            index = indexes[0]
+            duplicateContours.append((index, glyph[index].bounds))
     return duplicateContours
 
 registry.registerTest(
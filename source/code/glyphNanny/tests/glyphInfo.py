@@ -14,11 +14,11 @@ uniNamePattern = re.compile(
 
 def testUnicodeValue(glyph):
     """
-    A Unicode value should appear only once per font.
+    A Unicode value should match the glyph name.
+    Duplicate values are found by the duplicateUnicodes
+    font level test.
     """
-    font = wrapFont(glyph.font)
-    layer = font.getLayer(glyph.layer.name)
-    glyph = layer[glyph.name]
+    glyph = wrapGlyph(glyph)
     report = []
     uni = glyph.unicode
     name = glyph.name
@@ -34,17 +34,6 @@ def testUnicodeValue(glyph):
         expectedUni = AGL2UV.get(name)
         if expectedUni != uni:
             report.append("The Unicode value for this glyph may not be correct.")
-    # look for duplicates
-    if uni is not None:
-        duplicates = []
-        for name in sorted(font.keys()):
-            if name == glyph.name:
-                continue
-            other = font[name]
-            if other.unicode == uni:
-                duplicates.append(name)
-        if duplicates:
-            report.append("The Unicode for this glyph is also used by: %s." % " ".join(duplicates))
     return report
 
 registry.registerTest(
@@ -54,5 +43,5 @@ registry.registerTest(
     description="Unicode value may have problems.",
     testFunction=testUnicodeValue,
     defconClass=defcon.Glyph,
-    destructiveNotifications=["Glyph.UnicodesChanged"]
+    destructiveNotifications=["Glyph.UnicodesChanged", "Glyph.NameChanged"]
 )
\ No newline at end of file
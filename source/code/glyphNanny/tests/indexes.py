@@ -0,0 +1,479 @@
+"""
+Indexes that are shared by the tests.
+
+The layer-wide indexes are created on demand, one per
+layer, and stay up to date by observing the layer and
+its glyphs. The glyph-level indexes are representations.
+"""
+
+import math
+import weakref
+from fontTools.misc.arrayTools import unionRect, sectRect
+import defcon
+from . import registry
+
+# ---------------
+# Component Graph
+# ---------------
+
+_componentGraphs = weakref.WeakKeyDictionary()
+
+def getComponentGraph(layer):
+    """
+    Get the component graph for the layer.
+    """
+    graph = _componentGraphs.get(layer)
+    if graph is None:
+        graph = _componentGraphs[layer] = ComponentGraph(layer)
+    return graph
+
+
+class ComponentGraph(object):
+
+    """
+    A map of the component relationships in a layer.
+
+    The graph keeps both directions: the base glyphs used
+    by each composite and the composites that use each
+    base glyph. defcon already posts Glyph.ComponentsChanged
+    on a loaded composite when the outline or components
+    of one of its base glyphs change. The width of a base
+    glyph isn't covered by that, so the graph observes the
+    width of the base glyphs of the composites that have
+    been given to observeGlyph. When a base glyph's width
+    changes, the component dependent representations of
+    all of the composites that use it, directly or through
+    other composites, are destroyed. Other indexes can
+    register callbacks to be told about these changes.
+    """
+
+    def __init__(self, layer):
+        self._layer = weakref.ref(layer)
+        self._bases = {}
+        self._composites = {}
+        self._invalidationCallbacks = []
+        self._observedGlyphs = weakref.WeakSet()
+        self._observedBaseGlyphs = weakref.WeakSet()
+        for baseGlyphName, composites in layer.componentReferences.items():
+            for glyphName in composites:
+                self._addReference(glyphName, baseGlyphName)
+        # layers that aren't in a font can't be observed.
+        self._canObserve = layer.dispatcher is not None
+        if not self._canObserve:
+            return
+        layer.addObserver(self, "_layerGlyphAdded", "Layer.GlyphAdded")
+        layer.addObserver(self, "_layerGlyphDeleted", "Layer.GlyphDeleted")
+        layer.addObserver(self, "_layerGlyphNameChanged", "Layer.GlyphNameChanged")
+
+    def observeGlyph(self, glyph):
+        """
+        Keep the references of glyph up to date and
+        observe the widths of its base glyphs. This
+        should be called by the factories of component
+        dependent representations.
+        """
+        if not self._canObserve or glyph in self._observedGlyphs:
+            return
+        glyph.addObserver(self, "_glyphComponentsChanged", "Glyph.ComponentsChanged")
+        self._observedGlyphs.add(glyph)
+        self._updateReferences(glyph)
+        self._observeBaseGlyphs(glyph)
+
+    def _observeBaseGlyphs(self, glyph):
+        layer = self._layer()
+        for component in glyph.components:
+            baseGlyphName = component.baseGlyph
+            if baseGlyphName not in layer:
+                continue
+            baseGlyph = layer[baseGlyphName]
+            if baseGlyph in self._observedBaseGlyphs:
+                continue
+            baseGlyph.addObserver(self, "_baseGlyphWidthChanged", "Glyph.WidthChanged")
+            self._observedBaseGlyphs.add(baseGlyph)
+
+    def addInvalidationCallback(self, callback):
+        """
+        Call callback with a set of glyph names whenever
+        glyphs need to be invalidated because one of
+        their base glyphs changed.
+        """
+        self._invalidationCallbacks.append(callback)
+
+    # References
+
+    def _addReference(self, glyphName, baseGlyphName):
+        if glyphName not in self._bases:
+            self._bases[glyphName] = set()
+        self._bases[glyphName].add(baseGlyphName)
+        if baseGlyphName not in self._composites:
+            self._composites[baseGlyphName] = set()
+        self._composites[baseGlyphName].add(glyphName)
+
+    def _removeReferences(self, glyphName):
+        for baseGlyphName in self._bases.pop(glyphName, ()):
+            composites = self._composites.get(baseGlyphName)
+            if composites is None:
+                continue
+            composites.discard(glyphName)
+            if not composites:
+                del self._composites[baseGlyphName]
+
+    def _updateReferences(self, glyph):
+        glyphName = glyph.name
+        self._removeReferences(glyphName)
+        for component in glyph.components:
+            self._addReference(glyphName, component.baseGlyph)
+
+    def getBaseGlyphs(self, glyphName):
+        """
+        Get the names of the glyphs that glyphName
+        uses as components.
+        """
+        return set(self._bases.get(glyphName, ()))
+
+    def getComposites(self, glyphName):
+        """
+        Get the names of the glyphs that use glyphName
+        as a component.
+        """
+        return set(self._composites.get(glyphName, ()))
+
+    def getDependents(self, glyphName):
+        """
+        Get the names of all glyphs that use glyphName
+        either directly or through other composites.
+        """
+        dependents = set()
+        pending = list(self._composites.get(glyphName, ()))
+        while pending:
+            name = pending.pop()
+            if name in dependents:
+                continue
+            dependents.add(name)
+            pending.extend(self._composites.get(name, ()))
+        dependents.discard(glyphName)
+        return dependents
+
+    def orderGlyphNames(self, glyphNames):
+        """
+        Sort glyphNames so that base glyphs come before
+        the composites that use them. The given order is
+        kept as much as possible.
+        """
+        glyphNames = list(glyphNames)
+        available = set(glyphNames)
+        ordered = []
+        visited = set()
+        for glyphName in glyphNames:
+            if glyphName in visited:
+                continue
+            visited.add(glyphName)
+            stack = [(glyphName, iter(sorted(self._bases.get(glyphName, ()))))]
+            while stack:
+                name, bases = stack[-1]
+                for baseGlyphName in bases:
+                    if baseGlyphName in visited or baseGlyphName not in available:
+                        continue
+                    visited.add(baseGlyphName)
+                    stack.append((baseGlyphName, iter(sorted(self._bases.get(baseGlyphName, ())))))
+                    break
+                else:
+                    stack.pop()
+                    ordered.append(name)
+        return ordered
+
+    # Notifications
+
+    def _glyphComponentsChanged(self, notification):
+        glyph = notification.object
+        layer = self._layer()
+        if layer is None or glyph.layer is not layer:
+            return
+        self._updateReferences(glyph)
+        self._observeBaseGlyphs(glyph)
+        self._invalidateDependents(glyph.name)
+
+    def _baseGlyphWidthChanged(self, notification):
+        glyph = notification.object
+        layer = self._layer()
+        if layer is None or glyph.layer is not layer:
+            return
+        self._invalidateDependents(glyph.name)
+
+    def _layerGlyphAdded(self, notification):
+        glyphName = notification.data["name"]
+        self._updateReferences(self._layer()[glyphName])
+        self._invalidateDependents(glyphName)
+
+    def _layerGlyphDeleted(self, notification):
+        glyphName = notification.data["name"]
+        self._removeReferences(glyphName)
+        self._invalidateDependents(glyphName)
+
+    def _layerGlyphNameChanged(self, notification):
+        oldName = notification.data["oldValue"]
+        newName = notification.data["newValue"]
+        self._removeReferences(oldName)
+        self._updateReferences(self._layer()[newName])
+        self._invalidateDependents(oldName)
+        self._invalidateDependents(newName)
+
+    def _invalidateDependents(self, glyphName):
+        dependents = self.getDependents(glyphName)
+        if not dependents:
+            return
+        representationNames = registry.componentDependentRepresentations
+        # component dependent representations are only
+        # made for glyphs that were given to observeGlyph.
+        for glyph in list(self._observedGlyphs):
+            if glyph.name not in dependents:
+                continue
+            for representationName in representationNames:
+                glyph.destroyRepresentation(representationName)
+        for callback in self._invalidationCallbacks:
+            callback(dependents)
+
+# -------------
+# Metrics Index
+# -------------
+
+_metricsIndexes = weakref.WeakKeyDictionary()
+
+def getMetricsIndex(layer):
+    """
+    Get the metrics index for the layer.
+    """
+    index = _metricsIndexes.get(layer)
+    if index is None:
+        index = _metricsIndexes[layer] = GlyphMetricsIndex(layer)
+    return index
+
+
+class GlyphMetricsIndex(object):
+
+    """
+    An index of glyph bounds and side-bearings.
+
+    The bounds of a glyph are calculated only once,
+    when they are first requested, and are then kept
+    until the glyph changes. Composite bounds are
+    resolved through the bounds of their base glyphs,
+    so changes to a base glyph discard the bounds of
+    the composites that use it.
+    """
+
+    def __init__(self, layer):
+        self._layer = weakref.ref(layer)
+        self._bounds = {}
+        self._observedGlyphs = weakref.WeakSet()
+        self._componentGraph = getComponentGraph(layer)
+        self._componentGraph.addInvalidationCallback(self._componentGraphInvalidated)
+        layer.addObserver(self, "_layerGlyphsChanged", "Layer.GlyphAdded")
+        layer.addObserver(self, "_layerGlyphsChanged", "Layer.GlyphDeleted")
+        layer.addObserver(self, "_layerGlyphNameChanged", "Layer.GlyphNameChanged")
+
+    # Notifications
+
+    def _glyphOutlineChanged(self, notification):
+        self.invalidate(notification.object.name)
+
+    def _layerGlyphsChanged(self, notification):
+        self.invalidate(notification.data["name"])
+
+    def _layerGlyphNameChanged(self, notification):
+        self.invalidate(notification.data["oldValue"])
+        self.invalidate(notification.data["newValue"])
+
+    def _componentGraphInvalidated(self, glyphNames):
+        for glyphName in glyphNames:
+            self._bounds.pop(glyphName, None)
+
+    def invalidate(self, glyphName):
+        """
+        Discard the stored bounds for glyphName and
+        the glyphs that depend on it.
+        """
+        self._bounds.pop(glyphName, None)
+        for dependent in self._componentGraph.getDependents(glyphName):
+            self._bounds.pop(dependent, None)
+
+    # Bounds
+
+    def getBounds(self, glyphName):
+        """
+        Get the bounds of glyphName. None is returned if
+        the glyph doesn't exist or has no outline.
+        """
+        if glyphName in self._bounds:
+            return self._bounds[glyphName]
+        return self._resolveBounds(glyphName, set())
+
+    def getComponentBounds(self, component):
+        """
+        Get the bounds of component in its glyph.
+        """
+        return self._transformBounds(component, self.getBounds(component.baseGlyph))
+
+    def getMargins(self, glyphName):
+        """
+        Get the (left, right) margins of glyphName.
+        The margins are None if the glyph has no outline.
+        """
+        bounds = self.getBounds(glyphName)
+        if bounds is None:
+            return None, None
+        layer = self._layer()
+        xMin, yMin, xMax, yMax = bounds
+        return xMin, layer[glyphName].width - xMax
+
+    def _resolveBounds(self, glyphName, resolving):
+        layer = self._layer()
+        if layer is None or glyphName not in layer:
+            return None
+        glyph = layer[glyphName]
+        if glyph not in self._observedGlyphs:
+            glyph.addObserver(self, "_glyphOutlineChanged", "Glyph.ContoursChanged")
+            glyph.addObserver(self, "_glyphOutlineChanged", "Glyph.ComponentsChanged")
+            self._observedGlyphs.add(glyph)
+        resolving.add(glyphName)
+        bounds = None
+        for contour in glyph:
+            contourBounds = contour.bounds
+            if contourBounds is None:
+                continue
+            if bounds is None:
+                bounds = contourBounds
+            else:
+                bounds = unionRect(bounds, contourBounds)
+        for component in glyph.components:
+            baseGlyphName = component.baseGlyph
+            # a circular reference
+            if baseGlyphName in resolving:
+                continue
+            if baseGlyphName in self._bounds:
+                baseBounds = self._bounds[baseGlyphName]
+            else:
+                baseBounds = self._resolveBounds(baseGlyphName, resolving)
+            componentBounds = self._transformBounds(component, baseBounds)
+            if componentBounds is None:
+                continue
+            if bounds is None:
+                bounds = componentBounds
+            else:
+                bounds = unionRect(bounds, componentBounds)
+        resolving.discard(glyphName)
+        self._bounds[glyphName] = bounds
+        return bounds
+
+    def _transformBounds(self, component, bounds):
+        if bounds is None:
+            return None
+        xScale, xyScale, yxScale, yScale, xOffset, yOffset = component.transformation
+        # rotated and skewed components can't be
+        # calculated from the base bounds.
+        if xyScale or yxScale:
+            return component.bounds
+        xMin, yMin, xMax, yMax = bounds
+        xMin, xMax = sorted((xMin * xScale + xOffset, xMax * xScale + xOffset))
+        yMin, yMax = sorted((yMin * yScale + yOffset, yMax * yScale + yOffset))
+        return (xMin, yMin, xMax, yMax)
+
+# ---------------------
+# Contour Spatial Index
+# ---------------------
+
+class ContourSpatialIndex(object):
+
+    """
+    A uniform grid over the bounds of a glyph's contours.
+
+    This makes it possible to find the contours whose
+    bounds overlap without comparing every contour
+    with every other contour.
+    """
+
+    def __init__(self, contourBounds):
+        self._bounds = {}
+        self._cells = {}
+        for index, bounds in contourBounds:
+            if bounds is None:
+                continue
+            self._bounds[index] = bounds
+        if not self._bounds:
+            self._cellSize = 1
+            self._origin = (0, 0)
+            return
+        xMin, yMin, xMax, yMax = None, None, None, None
+        for bounds in self._bounds.values():
+            if xMin is None:
+                xMin, yMin, xMax, yMax = bounds
+            else:
+                xMin, yMin, xMax, yMax = unionRect((xMin, yMin, xMax, yMax), bounds)
+        # aim for roughly one contour per cell
+        cellsPerSide = max(1, int(math.ceil(math.sqrt(len(self._bounds)))))
+        self._cellSize = max(xMax - xMin, yMax - yMin, 1) / cellsPerSide
+        self._origin = (xMin, yMin)
+        for index, bounds in self._bounds.items():
+            for cell in self._iterateCells(bounds):
+                if cell not in self._cells:
+                    self._cells[cell] = []
+                self._cells[cell].append(index)
+
+    def _iterateCells(self, bounds):
+        xMin, yMin, xMax, yMax = bounds
+        xOrigin, yOrigin = self._origin
+        size = self._cellSize
+        x1 = int(math.floor((xMin - xOrigin) / size))
+        x2 = int(math.floor((xMax - xOrigin) / size))
+        y1 = int(math.floor((yMin - yOrigin) / size))
+        y2 = int(math.floor((yMax - yOrigin) / size))
+        for x in range(x1, x2 + 1):
+            for y in range(y1, y2 + 1):
+                yield (x, y)
+
+    def getBounds(self, index):
+        """
+        Get the bounds of the contour at index.
+        """
+        return self._bounds.get(index)
+
+    def query(self, bounds):
+        """
+        Get the sorted indexes of the contours whose
+        bounds overlap bounds.
+        """
+        if bounds is None:
+            return []
+        found = set()
+        for cell in self._iterateCells(bounds):
+            for index in self._cells.get(cell, ()):
+                if index in found:
+                    continue
+                if sectRect(bounds, self._bounds[index])[0]:
+                    found.add(index)
+        return sorted(found)
+
+    def overlappingPairs(self):
+        """
+        Get (index1, index2) pairs, with index1 < index2,
+        of the contours whose bounds overlap.
+        """
+        pairs = []
+        for index1, bounds in sorted(self._bounds.items()):
+            for index2 in self.query(bounds):
+                if index2 > index1:
+                    pairs.append((index1, index2))
+        return pairs
+
+
+def contourSpatialIndexFactory(glyph):
+    return ContourSpatialIndex(
+        [(index, contour.bounds) for index, contour in enumerate(glyph)]
+    )
+
+defcon.registerRepresentationFactory(
+    cls=defcon.Glyph,
+    name="GlyphNanny.contourSpatialIndex",
+    factory=contourSpatialIndexFactory,
+    destructiveNotifications=["Glyph.ContoursChanged"]
+)
@@ -0,0 +1,212 @@
+"""
+A lightweight description of the built in tests.
+
+This is enough to build the defaults and the tests table
+without importing the test implementations. The tests
+themselves are registered when they are first needed.
+See loadTests in this package. Entries here must match
+the registerTest calls in the test modules. registerTest
+raises an error when the level, title or description
+don't match.
+
+cost is a rough rank of how expensive a test is to run:
+
+1: a single pass over the points
+2: compares against the font or other contours
+3: builds and measures new outlines
+
+Tests with a cost of degradedTestCost or more are not
+run automatically in the glyph editor on glyphs that
+have too many points. They can still be run on demand.
+"""
+
+defaultTestCost = 2
+degradedTestCost = 3
+
+testManifest = {
+    "duplicateUnicodes" : dict(
+        level="font",
+        title="Duplicate Unicodes",
+        description="Unicode value is used by more than one glyph.",
+        cost=2
+    ),
+    "nearDuplicateGlyphs" : dict(
+        level="font",
+        title="Near Duplicate Glyphs",
+        description="Outline is nearly identical to another glyph.",
+        cost=2
+    ),
+    "unicodeValue" : dict(
+        level="glyphInfo",
+        title="Unicode Value",
+        description="Unicode value may have problems.",
+        cost=1
+    ),
+    "stemWidths" : dict(
+        level="glyph",
+        title="Stem Widths",
+        description="One or more stems do not match the registered values.",
+        cost=3
+    ),
+    "duplicateContours" : dict(
+        level="glyph",
+        title="Duplicate Contours",
+        description="One or more contours are duplicated.",
+        cost=1
+    ),
+    "duplicateComponents" : dict(
+        level="glyph",
+        title="Duplicate Components",
+        description="One or more components are duplicated.",
+        cost=1
+    ),
+    "ligatureMetrics" : dict(
+        level="metrics",
+        title="Ligature Side-Bearings",
+        description="The side-bearings don't match the ligature's presumed part metrics.",
+        cost=1
+    ),
+    "componentMetrics" : dict(
+        level="metrics",
+        title="Component Side-Bearings",
+        description="The side-bearings don't match the component's metrics.",
+        cost=1
+    ),
+    "metricsSymmetry" : dict(
+        level="metrics",
+        title="Symmetry",
+        description="The side-bearings are almost equal.",
+        cost=1
+    ),
+    "smallContours" : dict(
+        level="contour",
+        title="Small Contours",
+        description="One or more contours are suspiciously small.",
+        cost=1
+    ),
+    "openContour" : dict(
+        level="contour",
+        title="Open Contours",
+        description="One or more contours are not properly closed.",
+        cost=1
+    ),
+    "extremePoints" : dict(
+        level="contour",
+        title="Extreme Points",
+        description="One or more curves need an extreme point.",
+        cost=3
+    ),
+    "curveSymmetry" : dict(
+        level="contour",
+        title="Curve Symmetry",
+        description="One or more curve pairs are slightly asymmetrical.",
+        cost=2
+    ),
+    "angleNearMiss" : dict(
+        level="segment",
+        title="Angle Near Miss",
+        description="One or more lines are nearly at important angles.",
+        cost=1
+    ),
+    "pointsNearVerticalMetrics" : dict(
+        level="segment",
+        title="Near Vertical Metrics",
+        description="Two or more points are just off a vertical metric.",
+        cost=2
+    ),
+    "unsmoothSmooths" : dict(
+        level="segment",
+        title="Unsmooth Smooths",
+        description="One or more smooth points do not have handles that are properly placed.",
+        cost=1
+    ),
+    "complexCurves" : dict(
+        level="segment",
+        title="Complex Curves",
+        description="One or more curves is suspiciously complex.",
+        cost=1
+    ),
+    "crossedHandles" : dict(
+        level="segment",
+        title="Crossed Handles",
+        description="One or more curves contain crossed handles.",
+        cost=1
+    ),
+    "unnecessaryHandles" : dict(
+        level="segment",
+        title="Unnecessary Handles",
+        description="One or more curves has unnecessary handles.",
+        cost=1
+    ),
+    "unevenHandles" : dict(
+        level="segment",
+        title="Uneven Handles",
+        description="One or more curves has uneven handles.",
+        cost=3
+    ),
+    "strayPoints" : dict(
+        level="point",
+        title="Stray Points",
+        description="One or more stray points are present.",
+        cost=1
+    ),
+    "unnecessaryPoints" : dict(
+        level="point",
+        title="Unnecessary Points",
+        description="One or more unnecessary points are present.",
+        cost=3
+    ),
+    "overlappingPoints" : dict(
+        level="point",
+        title="Overlapping Points",
+        description="Two or more points are overlapping.",
+        cost=1
+    )
+}
+
+def getTestCost(testIdentifier):
+    """
+    Get the cost rank for the test. Tests that
+    are not in the manifest get the default.
+    """
+    testData = testManifest.get(testIdentifier)
+    if testData is None:
+        return defaultTestCost
+    return testData["cost"]
+
+# The severity of an issue matches the color that
+# the glyph editor uses to show it:
+#
+# inform: information about the glyph
+# review: something should be looked at
+# insert: something needs to be added
+# remove: something needs to be removed
+
+testSeverities = (
+    "inform",
+    "review",
+    "insert",
+    "remove"
+)
+defaultTestSeverity = "review"
+
+_severities = {
+    "duplicateUnicodes" : "inform",
+    "unicodeValue" : "inform",
+    "openContour" : "insert",
+    "extremePoints" : "insert",
+    "duplicateContours" : "remove",
+    "duplicateComponents" : "remove",
+    "smallContours" : "remove",
+    "unnecessaryHandles" : "remove",
+    "strayPoints" : "remove",
+    "unnecessaryPoints" : "remove",
+    "overlappingPoints" : "remove"
+}
+
+def getTestSeverity(testIdentifier):
+    """
+    Get the severity of the issues found by the
+    test. Tests that are not listed get the default.
+    """
+    return _severities.get(testIdentifier, defaultTestSeverity)
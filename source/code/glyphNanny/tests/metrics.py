@@ -1,6 +1,6 @@
 import defcon
 from . import registry
-from .wrappers import *
+from .indexes import getMetricsIndex
 
 # Ligatures
 
@@ -20,9 +20,8 @@ def testLigatureMetrics(glyph):
             bounds : (xMin, yMin, xMax, yMax)
         }
     """
-    font = wrapFont(glyph.font)
-    layer = font.getLayer(glyph.layer.name)
-    glyph = layer[glyph.name]
+    layer = glyph.layer
+    index = getMetricsIndex(layer)
     name = glyph.name
     if "_" not in name:
         return
@@ -36,24 +35,23 @@ def testLigatureMetrics(glyph):
     rightPart = parts[-1]
     # try snapping on the suffixes
     if suffix:
-        if leftPart + "." + suffix in font:
+        if leftPart + "." + suffix in layer:
             leftPart += "." + suffix
-        if rightPart + "." + suffix in font:
+        if rightPart + "." + suffix in layer:
             rightPart += "." + suffix
     # test
-    left = glyph.leftMargin
-    right = glyph.rightMargin
-    report = dict(leftMessage=None, rightMessage=None, left=left, right=right, width=glyph.width, bounds=glyph.bounds)
-    if leftPart not in font:
+    left, right = index.getMargins(name)
+    report = dict(leftMessage=None, rightMessage=None, left=left, right=right, width=glyph.width, bounds=index.getBounds(name))
+    if leftPart not in layer:
         report["leftMessage"] = "Couldn't find the ligature's left component."
     else:
-        expectedLeft = font[leftPart].leftMargin
+        expectedLeft = index.getMargins(leftPart)[0]
         if left != expectedLeft:
             report["leftMessage"] = "Left doesn't match the presumed part %s left" % leftPart
-    if rightPart not in font:
+    if rightPart not in layer:
         report["rightMessage"] = "Couldn't find the ligature's right component."
     else:
-        expectedRight = font[rightPart].rightMargin
+        expectedRight = index.getMargins(rightPart)[1]
         if right != expectedRight:
             report["rightMessage"] = "Right doesn't match the presumed part %s right" % rightPart
     if report["leftMessage"] or report["rightMessage"]:
@@ -67,7 +65,8 @@ registry.registerTest(
     description="The side-bearings don't match the ligature's presumed part metrics.",
     testFunction=testLigatureMetrics,
     defconClass=defcon.Glyph,
-    destructiveNotifications=["Glyph.WidthChanged", "Glyph.ContoursChanged", "Glyph.ComponentsChanged"]
+    destructiveNotifications=["Glyph.WidthChanged", "Glyph.ContoursChanged", "Glyph.ComponentsChanged"],
+    dependencies=["layerGlyphs"]
 )
 
 # Components
@@ -87,18 +86,17 @@ def testComponentMetrics(glyph):
             bounds : (xMin, yMin, xMax, yMax)
         }
     """
-    font = wrapFont(glyph.font)
-    layer = font.getLayer(glyph.layer.name)
-    glyph = layer[glyph.name]
-    components = [c for c in glyph.components if c.baseGlyph in font]
+    layer = glyph.layer
+    index = getMetricsIndex(layer)
+    components = [c for c in glyph.components if c.baseGlyph in layer]
     # no components
     if len(components) == 0:
         return
-    boxes = [c.bounds for c in components]
+    boxes = {c : index.getComponentBounds(c) for c in components}
     # a component has no contours
-    if None in boxes:
+    if None in boxes.values():
         return
-    report = dict(leftMessage=None, rightMessage=None, left=None, right=None, width=glyph.width, box=glyph.bounds)
+    report = dict(leftMessage=None, rightMessage=None, left=None, right=None, width=glyph.width, box=index.getBounds(glyph.name))
     problem = False
     if len(components) > 1:
         # filter marks
@@ -106,20 +104,20 @@ def testComponentMetrics(glyph):
         markCategories = ("Sk", "Zs", "Lm")
         for component in components:
             baseGlyphName = component.baseGlyph
-            category = font.naked().unicodeData.categoryForGlyphName(baseGlyphName, allowPseudoUnicode=True)
+            category = glyph.font.unicodeData.categoryForGlyphName(baseGlyphName, allowPseudoUnicode=True)
             if category not in markCategories:
                 nonMarks.append(component)
         if nonMarks:
             components = nonMarks
     # order the components from left to right based on their boxes
     if len(components) > 1:
-        leftComponent, rightComponent = _getXMinMaxComponents(components)
+        leftComponent, rightComponent = _getXMinMaxComponents(components, boxes)
     else:
         leftComponent = rightComponent = components[0]
-    expectedLeft = _getComponentBaseMargins(font, leftComponent)[0]
-    expectedRight = _getComponentBaseMargins(font, rightComponent)[1]
-    left = leftComponent.bounds[0]
-    right = glyph.width - rightComponent.bounds[2]
+    expectedLeft = _getComponentBaseMargins(index, leftComponent)[0]
+    expectedRight = _getComponentBaseMargins(index, rightComponent)[1]
+    left = boxes[leftComponent][0]
+    right = glyph.width - boxes[rightComponent][2]
     if left != expectedLeft:
         problem = True
         report["leftMessage"] = "%s component left does not match %s left" % (leftComponent.baseGlyph, leftComponent.baseGlyph)
@@ -131,19 +129,19 @@ def testComponentMetrics(glyph):
     if problem:
         return report
 
-def _getComponentBaseMargins(font, component):
+def _getComponentBaseMargins(index, component):
     baseGlyphName = component.baseGlyph
-    baseGlyph = font[baseGlyphName]
-    scale = component.scale[0]
-    left = baseGlyph.leftMargin * scale
-    right = baseGlyph.rightMargin * scale
+    scale = component.transformation[0]
+    left, right = index.getMargins(baseGlyphName)
+    left = left * scale
+    right = right * scale
     return left, right
 
-def _getXMinMaxComponents(components):
+def _getXMinMaxComponents(components, boxes):
     minSide = []
     maxSide = []
     for component in components:
-        xMin, yMin, xMax, yMax = component.bounds
+        xMin, yMin, xMax, yMax = boxes[component]
         minSide.append((xMin, component))
         maxSide.append((xMax, component))
     o = [
@@ -159,7 +157,8 @@ registry.registerTest(
     description="The side-bearings don't match the component's metrics.",
     testFunction=testComponentMetrics,
     defconClass=defcon.Glyph,
-    destructiveNotifications=["Glyph.WidthChanged", "Glyph.ContoursChanged", "Glyph.ComponentsChanged"]
+    destructiveNotifications=["Glyph.WidthChanged", "Glyph.ContoursChanged", "Glyph.ComponentsChanged"],
+    dependencies=["componentBases"]
 )
 
 # Symmetry
@@ -178,11 +177,8 @@ def testMetricsSymmetry(glyph):
             bounds : (xMin, yMin, xMax, yMax)
         }
     """
-    glyph = wrapGlyph(glyph)
-    if glyph.leftMargin == None:
-        return
-    left = glyph.leftMargin
-    right = glyph.rightMargin
+    index = getMetricsIndex(glyph.layer)
+    left, right = index.getMargins(glyph.name)
     if left is None or right is None:
         return None
     diff = int(round(abs(left - right)))
@@ -202,5 +198,6 @@ registry.registerTest(
     description="The side-bearings are almost equal.",
     testFunction=testMetricsSymmetry,
     defconClass=defcon.Glyph,
-    destructiveNotifications=["Glyph.WidthChanged", "Glyph.ContoursChanged", "Glyph.ComponentsChanged"]
+    destructiveNotifications=["Glyph.WidthChanged", "Glyph.ContoursChanged", "Glyph.ComponentsChanged"],
+    dependencies=["componentBases"]
 )
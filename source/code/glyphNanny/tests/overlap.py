@@ -0,0 +1,303 @@
+"""
+Outline overlap detection and removal.
+
+The closed contours of a glyph are flattened into line
+pieces and a sweep over x finds the first pair of pieces
+that intersect. Only pieces that are active at the same
+x and that share some y range are compared, so glyphs
+without overlaps are cleared without comparing every
+piece with every other piece.
+"""
+
+import weakref
+from fontTools.pens.basePen import BasePen
+import defcon
+import booleanOperations
+from . import registry
+
+curveFlatteningSteps = 16
+
+# -------------
+# Overlap Check
+# -------------
+
+def hasOverlapFactory(glyph):
+    """
+    Get a bool indicating if the contours in the glyph
+    intersect each other, intersect themselves or are
+    stacked directly inside of contours with the same
+    direction.
+
+    Components are not checked.
+    """
+    pieces = []
+    contourIndexes = []
+    for contourIndex, contour in enumerate(glyph):
+        if contour.open:
+            continue
+        pen = _FlatteningPen()
+        contour.draw(pen)
+        contourPieces = pen.pieces
+        if not contourPieces:
+            continue
+        contourIndexes.append(contourIndex)
+        pieceCount = len(contourPieces)
+        for pieceIndex, (pt1, pt2) in enumerate(contourPieces):
+            pieces.append((contourIndex, pieceIndex, pieceCount, pt1, pt2))
+    if _sweepForIntersection(pieces):
+        return True
+    # intersecting contours have been handled, so
+    # the contours are nested inside of each other.
+    # a contour is stacked if its closest enclosing
+    # contour has the same direction. contours
+    # further out don't matter: the bar of a theta
+    # has the same direction as the outer contour
+    # but it is inside of the counter.
+    spatialIndex = glyph.getRepresentation("GlyphNanny.contourSpatialIndex")
+    contourIndexes = set(contourIndexes)
+    for index in sorted(contourIndexes):
+        contour = glyph[index]
+        parent = None
+        parentArea = None
+        for otherIndex in spatialIndex.query(spatialIndex.getBounds(index)):
+            if otherIndex == index or otherIndex not in contourIndexes:
+                continue
+            if not _contourIsInside(contour, glyph[otherIndex]):
+                continue
+            # nested contours have nested bounds, so the
+            # smallest bounds belong to the closest one.
+            xMin, yMin, xMax, yMax = spatialIndex.getBounds(otherIndex)
+            area = (xMax - xMin) * (yMax - yMin)
+            if parent is None or area < parentArea:
+                parent = otherIndex
+                parentArea = area
+        if parent is not None and glyph[parent].clockwise == contour.clockwise:
+            return True
+    return False
+
+def _contourIsInside(contour, otherContour):
+    point = contour[0]
+    return otherContour.pointInside((point.x, point.y))
+
+def _sweepForIntersection(pieces):
+    events = []
+    for piece in pieces:
+        (x1, y1), (x2, y2) = piece[3], piece[4]
+        events.append((min(x1, x2), max(x1, x2), min(y1, y2), max(y1, y2), piece))
+    events.sort(key=lambda event: event[0])
+    active = []
+    for event in events:
+        xMin, xMax, yMin, yMax, piece = event
+        # retire the pieces that end before this one starts
+        active = [other for other in active if other[1] >= xMin]
+        for other in active:
+            if other[3] < yMin or other[2] > yMax:
+                continue
+            otherPiece = other[4]
+            if _piecesAreNeighbors(piece, otherPiece):
+                continue
+            if _piecesIntersect(piece[3], piece[4], otherPiece[3], otherPiece[4]):
+                return True
+        active.append(event)
+    return False
+
+def _piecesAreNeighbors(piece1, piece2):
+    contourIndex1, pieceIndex1, pieceCount, pt1, pt2 = piece1
+    contourIndex2, pieceIndex2 = piece2[:2]
+    if contourIndex1 != contourIndex2:
+        return False
+    difference = abs(pieceIndex1 - pieceIndex2)
+    return difference == 1 or difference == pieceCount - 1
+
+def _orientation(pt1, pt2, pt3):
+    value = (pt2[0] - pt1[0]) * (pt3[1] - pt1[1]) - (pt2[1] - pt1[1]) * (pt3[0] - pt1[0])
+    if value > 0:
+        return 1
+    if value < 0:
+        return -1
+    return 0
+
+def _onPiece(pt1, pt2, pt):
+    return (
+        min(pt1[0], pt2[0]) <= pt[0] <= max(pt1[0], pt2[0])
+        and min(pt1[1], pt2[1]) <= pt[1] <= max(pt1[1], pt2[1])
+    )
+
+def _piecesIntersect(a1, a2, b1, b2):
+    o1 = _orientation(a1, a2, b1)
+    o2 = _orientation(a1, a2, b2)
+    o3 = _orientation(b1, b2, a1)
+    o4 = _orientation(b1, b2, a2)
+    if o1 != o2 and o3 != o4:
+        return True
+    # collinear and touching
+    if o1 == 0 and _onPiece(a1, a2, b1):
+        return True
+    if o2 == 0 and _onPiece(a1, a2, b2):
+        return True
+    if o3 == 0 and _onPiece(b1, b2, a1):
+        return True
+    if o4 == 0 and _onPiece(b1, b2, a2):
+        return True
+    return False
+
+
+class _FlatteningPen(BasePen):
+
+    def __init__(self):
+        super().__init__(None)
+        self.pieces = []
+
+    def _addPiece(self, pt1, pt2):
+        if pt1 == pt2:
+            return
+        self.pieces.append((pt1, pt2))
+
+    def _moveTo(self, pt):
+        self._start = pt
+
+    def _lineTo(self, pt):
+        self._addPiece(self._getCurrentPoint(), pt)
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        x0, y0 = self._getCurrentPoint()
+        x1, y1 = pt1
+        x2, y2 = pt2
+        x3, y3 = pt3
+        previous = (x0, y0)
+        for i in range(1, curveFlatteningSteps):
+            t = i / curveFlatteningSteps
+            mt = 1 - t
+            a = mt * mt * mt
+            b = 3 * mt * mt * t
+            c = 3 * mt * t * t
+            d = t * t * t
+            point = (
+                a * x0 + b * x1 + c * x2 + d * x3,
+                a * y0 + b * y1 + c * y2 + d * y3
+            )
+            self._addPiece(previous, point)
+            previous = point
+        self._addPiece(previous, pt3)
+
+    def _qCurveToOne(self, pt1, pt2):
+        x0, y0 = self._getCurrentPoint()
+        x1, y1 = pt1
+        x2, y2 = pt2
+        previous = (x0, y0)
+        for i in range(1, curveFlatteningSteps):
+            t = i / curveFlatteningSteps
+            mt = 1 - t
+            a = mt * mt
+            b = 2 * mt * t
+            c = t * t
+            point = (
+                a * x0 + b * x1 + c * x2,
+                a * y0 + b * y1 + c * y2
+            )
+            self._addPiece(previous, point)
+            previous = point
+        self._addPiece(previous, pt2)
+
+    def _closePath(self):
+        current = self._getCurrentPoint()
+        self._addPiece(current, self._start)
+
+    def _endPath(self):
+        pass
+
+
+defcon.registerRepresentationFactory(
+    cls=defcon.Glyph,
+    name="GlyphNanny.hasOverlap",
+    factory=hasOverlapFactory,
+    destructiveNotifications=["Glyph.ContoursChanged"]
+)
+
+# ---------------
+# Overlap Removal
+# ---------------
+
+_overlapRemovedGlyphs = weakref.WeakKeyDictionary()
+
+def getOverlapRemovedGlyph(glyph):
+    """
+    Get a version of the glyph with the overlaps removed.
+
+    The glyph is returned as is if it doesn't have any
+    overlaps. Otherwise, a copy that is not in the layer
+    is made and the overlaps are removed from the copy.
+    The copies are cached by the digest of the glyph so
+    that they are only made again after the glyph has
+    been changed. The glyph is never modified.
+    """
+    if not glyph.getRepresentation("GlyphNanny.hasOverlap"):
+        return glyph
+    layer = glyph.layer
+    if layer not in _overlapRemovedGlyphs:
+        _overlapRemovedGlyphs[layer] = {}
+    copies = _overlapRemovedGlyphs[layer]
+    digest = glyph.getRepresentation("GlyphNanny.overlapDigest")
+    cached = copies.get(glyph.name)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+    copy = defcon.Glyph(layer=layer)
+    copy.name = glyph.name
+    copy.copyDataFromGlyph(glyph)
+    copy.clearContours()
+    pointPen = copy.getPointPen()
+    closedContours = []
+    for contour in glyph:
+        if contour.open:
+            contour.drawPoints(pointPen)
+        else:
+            closedContours.append(contour)
+    booleanOperations.union(closedContours, pointPen)
+    copies[glyph.name] = (digest, copy)
+    return copy
+
+def forgetOverlapRemovedGlyph(glyph):
+    """
+    Remove the cached copy of the glyph.
+    """
+    copies = _overlapRemovedGlyphs.get(glyph.layer)
+    if copies is not None:
+        copies.pop(glyph.name, None)
+
+registry.purgeCallbacks.append(forgetOverlapRemovedGlyph)
+
+def overlapDigestFactory(glyph):
+    contours = tuple(
+        tuple((point.x, point.y, point.segmentType) for point in contour)
+        for contour in glyph
+    )
+    components = tuple(
+        (component.baseGlyph, tuple(component.transformation))
+        for component in glyph.components
+    )
+    anchors = tuple(
+        (anchor.name, anchor.x, anchor.y)
+        for anchor in glyph.anchors
+    )
+    return (
+        glyph.width,
+        glyph.height,
+        tuple(glyph.unicodes),
+        contours,
+        components,
+        anchors
+    )
+
+defcon.registerRepresentationFactory(
+    cls=defcon.Glyph,
+    name="GlyphNanny.overlapDigest",
+    factory=overlapDigestFactory,
+    destructiveNotifications=[
+        "Glyph.WidthChanged",
+        "Glyph.HeightChanged",
+        "Glyph.UnicodesChanged",
+        "Glyph.ContoursChanged",
+        "Glyph.ComponentsChanged",
+        "Glyph.AnchorsChanged"
+    ]
+)
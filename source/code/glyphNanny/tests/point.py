@@ -1,4 +1,3 @@
-from fontTools.misc import bezierTools as ftBezierTools
 import defcon
 from fontPens.penTools import distance
 from . import registry
@@ -7,6 +6,10 @@ from .tools import (
     unwrapPoint,
     calculateAngle
 )
+from .bezier import (
+    evaluateCubics,
+    calculateCubicArcLength
+)
 
 # Stray Points
 
@@ -117,8 +120,8 @@ def _testForUnnecessaryCurvePoints(contour):
                     _makeBCPAbsolute(end.anchor, end.bcpIn),
                     end.anchor
                 )
-                beforeSegment1Length = abs(ftBezierTools.approximateCubicArcLength(*beforeSegment1))
-                beforeSegment2Length = abs(ftBezierTools.approximateCubicArcLength(*beforeSegment2))
+                beforeSegment1Length = calculateCubicArcLength(beforeSegment1)
+                beforeSegment2Length = calculateCubicArcLength(beforeSegment2)
                 beforeLength = beforeSegment1Length + beforeSegment2Length
                 # calculate after length
                 start = i - 1
@@ -136,14 +139,15 @@ def _testForUnnecessaryCurvePoints(contour):
                     end.anchor
                 )
                 midT = beforeSegment1Length / beforeLength
-                afterSegment1, afterSegment2 = ftBezierTools.splitCubicAtT(*afterSegment, midT)
+                # sample the before segments and the
+                # corresponding parts of the after segment
+                # instead of splitting the after segment.
                 subSegmentCount = 10
-                beforeSegment1Points = _splitSegmentByCount(*beforeSegment1, subSegmentCount=subSegmentCount)
-                beforeSegment2Points = _splitSegmentByCount(*beforeSegment2, subSegmentCount=subSegmentCount)
-                afterSegment1Points = _splitSegmentByCount(*afterSegment1, subSegmentCount=subSegmentCount)
-                afterSegment2Points = _splitSegmentByCount(*afterSegment2, subSegmentCount=subSegmentCount)
+                ts = [i / subSegmentCount for i in range(subSegmentCount + 1)]
+                afterTs = [t * midT for t in ts] + [midT + t * (1 - midT) for t in ts[1:]]
+                beforeSegment1Points, beforeSegment2Points = evaluateCubics((beforeSegment1, beforeSegment2), ts)
+                afterPoints = evaluateCubics((afterSegment,), afterTs)[0]
                 beforePoints = beforeSegment1Points + beforeSegment2Points[1:]
-                afterPoints = afterSegment1Points + afterSegment2Points[1:]
                 leashLength = beforeLength * tolerance
                 isUnnecessary = True
                 for i, b in enumerate(beforePoints):
@@ -161,14 +165,6 @@ def _makeBCPAbsolute(anchor, bcp):
     x2, y2 = bcp
     return (x1 + x2, y1 + y2)
 
-def _splitSegmentByCount(pt1, pt2, pt3, pt4, subSegmentCount=10):
-    ts = [i / subSegmentCount for i in range(subSegmentCount + 1)]
-    splits = ftBezierTools.splitCubicAtT(pt1, pt2, pt3, pt4, *ts)
-    anchors = []
-    for segment in splits:
-        anchors.append(segment[-1])
-    return anchors
-
 registry.registerTest(
     identifier="unnecessaryPoints",
     level="point",
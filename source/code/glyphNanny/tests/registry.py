@@ -1,8 +1,27 @@
+import collections
 import defcon
+from .manifest import testManifest
 
 testRegistry = {}
 
+# Tests can declare that their results depend
+# on more than the object being tested:
+#
+# componentBases: the base glyphs of the glyph's components
+# fontInfo: the font's info (zones, stems, vertical metrics)
+# layerGlyphs: the other glyphs in the layer
+
+# Names of representations that need to be
+# destroyed when a base glyph of one of the
+# object's components changes.
+componentDependentRepresentations = set()
+
+# Tests at the font level are registered on
+# defcon.Layer. They run once per layer and
+# return their results keyed by glyph name.
+
 fallbackDestructiveNotifications = {
+    defcon.Layer : ["Layer.Changed"],
     defcon.Glyph : ["Glyph.Changed"],
     defcon.Contour : ["Contour.Changed"]
 }
@@ -14,11 +33,16 @@ def registerTest(
         description=None,
         testFunction=None,
         defconClass=None,
-        destructiveNotifications=None
+        destructiveNotifications=None,
+        dependencies=()
     ):
+    _checkManifest(identifier, level=level, title=title, description=description)
     representationName = "GlyphNanny." + identifier
     if destructiveNotifications is None:
         destructiveNotifications = fallbackDestructiveNotifications.get(defconClass, None)
+    if "componentBases" in dependencies:
+        componentDependentRepresentations.add(representationName)
+        testFunction = _makeComponentObservingFactory(testFunction)
     defcon.registerRepresentationFactory(
         cls=defconClass,
         name=representationName,
@@ -29,5 +53,124 @@ def registerTest(
         level=level,
         description=description,
         title=title,
-        representationName=representationName
+        representationName=representationName,
+        dependencies=tuple(dependencies)
+    )
+
+def _checkManifest(identifier, **values):
+    """
+    The defaults and the tests table are built from the
+    manifest before the tests are registered. Make sure
+    that the manifest entry for a built in test matches
+    what is being registered. Tests that aren't in the
+    manifest aren't checked.
+    """
+    manifestData = testManifest.get(identifier)
+    if manifestData is None:
+        return
+    for key, value in values.items():
+        if manifestData.get(key) != value:
+            raise ValueError(
+                "The manifest %s for %s is %r but the test registers %r."
+                % (key, identifier, manifestData.get(key), value)
+            )
+
+def _makeComponentObservingFactory(testFunction):
+    # the component graph needs to know about the
+    # composites that have component dependent
+    # representations so that it can observe the
+    # widths of their base glyphs.
+
+    def factory(glyph, **kwargs):
+        if glyph.layer is not None:
+            from .indexes import getComponentGraph
+            getComponentGraph(glyph.layer).observeGlyph(glyph)
+        return testFunction(glyph, **kwargs)
+
+    return factory
+
+# ------------
+# Cache Policy
+# ------------
+
+# Batch runs can limit how many representations
+# are left in defcon's representation caches:
+#
+# keep: leave everything in the cache.
+# purge: destroy a glyph's representations after
+#        its report has been made.
+# lru: keep the representations of the cacheSize
+#      most recently tested glyphs.
+
+cachePolicies = ("keep", "purge", "lru")
+defaultCacheSize = 256
+representationPrefix = "GlyphNanny."
+
+def purgeRepresentations(obj):
+    """
+    Destroy the GlyphNanny representations of obj.
+    """
+    names = set(
+        name
+        for name, kwargs in obj.representationKeys()
+        if name.startswith(representationPrefix)
     )
+    for name in names:
+        obj.destroyRepresentation(name)
+
+def purgeGlyphRepresentations(glyph):
+    """
+    Destroy the GlyphNanny representations of the
+    glyph and its contours.
+    """
+    purgeRepresentations(glyph)
+    for contour in glyph:
+        purgeRepresentations(contour)
+
+
+class BatchCache(object):
+
+    """
+    Apply a cache policy to the glyphs tested
+    during a batch run.
+    """
+
+    def __init__(self, policy="keep", cacheSize=None):
+        if policy not in cachePolicies:
+            raise ValueError("Unknown cache policy: %r" % policy)
+        if cacheSize is None:
+            cacheSize = defaultCacheSize
+        self.policy = policy
+        self.cacheSize = cacheSize
+        self._recent = collections.OrderedDict()
+
+    def glyphTested(self, glyph):
+        if self.policy == "purge":
+            self._purgeGlyph(glyph)
+        elif self.policy == "lru":
+            key = id(glyph)
+            self._recent[key] = glyph
+            self._recent.move_to_end(key)
+            while len(self._recent) > self.cacheSize:
+                key, oldGlyph = self._recent.popitem(last=False)
+                self._purgeGlyph(oldGlyph)
+
+    def finish(self, layer):
+        """
+        Destroy the font level representations
+        of the layer unless the policy is keep.
+        """
+        if self.policy == "keep":
+            return
+        purgeRepresentations(layer)
+
+    def _purgeGlyph(self, glyph):
+        purgeGlyphRepresentations(glyph)
+        for callback in purgeCallbacks:
+            callback(glyph)
+
+# Functions that are called with each purged glyph
+# so that caches outside of defcon's representation
+# caches can forget about the glyph.
+
+purgeCallbacks = []
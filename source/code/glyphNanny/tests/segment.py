@@ -10,7 +10,7 @@ from .tools import (
     calculateAngle,
     calculateAngleOffset,
     calculateLineLineIntersection,
-    calculateLineCurveIntersection,
+    calculateLinesCurveIntersections,
     calculateLineLength,
     calculateLineThroughPoint
 )
@@ -166,7 +166,8 @@ registry.registerTest(
     description="Two or more points are just off a vertical metric.",
     testFunction=testForSegmentsNearVerticalMetrics,
     defconClass=defcon.Contour,
-    destructiveNotifications=["Contour.PointsChanged"]
+    destructiveNotifications=["Contour.PointsChanged"],
+    dependencies=["fontInfo"]
 )
 
 # Unsmooth Smooths
@@ -418,30 +419,31 @@ def testForUnevenHandles(contour):
             if rayIntersection is not None:
                 # draw a line between the off curves and the intersection
                 # and find out where these lines intersect the curve
-                off1Intersection = calculateLineCurveIntersection((off1, rayIntersection), curve)
-                off2Intersection = calculateLineCurveIntersection((off2, rayIntersection), curve)
-                if off1Intersection is not None and off2Intersection is not None:
-                    if off1Intersection.points and off2Intersection.points:
-                        off1IntersectionPoint = (off1Intersection.points[0].x, off1Intersection.points[0].y)
-                        off2IntersectionPoint = (off2Intersection.points[0].x, off2Intersection.points[0].y)
-                        # assemble the off curves and their intersections into lines
-                        off1Line = (off1, off1IntersectionPoint)
-                        off2Line = (off2, off2IntersectionPoint)
-                        # measure and compare these
-                        # if they are not both very short calculate the ratio
-                        length1, length2 = sorted((calculateLineLength(*off1Line), calculateLineLength(*off2Line)))
-                        if length1 >= 3 and length2 >= 3:
-                            ratio = length2 / float(length1)
-                            # if outside acceptable range, flag
-                            if ratio > 1.5:
-                                off1Shape = _getUnevenHandleShape(on1, off1, off2, on2, off1Intersection, on1, off1IntersectionPoint, off1)
-                                off2Shape = _getUnevenHandleShape(on1, off1, off2, on2, off2Intersection, off2IntersectionPoint, on2, off2)
-                                unevenHandles.append((off1, off2, off1Shape, off2Shape))
+                off1Intersections, off2Intersections = calculateLinesCurveIntersections(
+                    [(off1, rayIntersection), (off2, rayIntersection)],
+                    curve
+                )
+                if off1Intersections and off2Intersections:
+                    off1IntersectionPoint = off1Intersections[0][1]
+                    off2IntersectionPoint = off2Intersections[0][1]
+                    # assemble the off curves and their intersections into lines
+                    off1Line = (off1, off1IntersectionPoint)
+                    off2Line = (off2, off2IntersectionPoint)
+                    # measure and compare these
+                    # if they are not both very short calculate the ratio
+                    length1, length2 = sorted((calculateLineLength(*off1Line), calculateLineLength(*off2Line)))
+                    if length1 >= 3 and length2 >= 3:
+                        ratio = length2 / float(length1)
+                        # if outside acceptable range, flag
+                        if ratio > 1.5:
+                            off1Shape = _getUnevenHandleShape(on1, off1, off2, on2, off1Intersections, on1, off1IntersectionPoint, off1)
+                            off2Shape = _getUnevenHandleShape(on1, off1, off2, on2, off2Intersections, off2IntersectionPoint, on2, off2)
+                            unevenHandles.append((off1, off2, off1Shape, off2Shape))
         prevPoint = segment.onCurve
     return unevenHandles
 
-def _getUnevenHandleShape(pt0, pt1, pt2, pt3, intersection, start, end, off):
-    splitSegments = ftBezierTools.splitCubicAtT(pt0, pt1, pt2, pt3, *intersection.t)
+def _getUnevenHandleShape(pt0, pt1, pt2, pt3, intersections, start, end, off):
+    splitSegments = ftBezierTools.splitCubicAtT(pt0, pt1, pt2, pt3, *[t for t, point in intersections])
     curves = []
     for segment in splitSegments:
         if roundPoint(segment[0]) != roundPoint(start) and not curves:
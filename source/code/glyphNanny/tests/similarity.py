@@ -0,0 +1,334 @@
+"""
+Geometric signatures and near-duplicate detection.
+
+Every glyph gets a normalized signature: its outline is
+scaled into a unit box and rasterized into a coarse grid
+of occupied cells. The cells are summarized with MinHash
+so that candidate pairs can be found by locality-sensitive
+hashing (banding) instead of comparing every glyph with
+every other glyph. Candidates are then verified with the
+Jaccard similarity of the full cell sets.
+
+The scaling throws away the size and position of the
+outline, so the signature also keeps the bounds. Pairs
+with bounds that differ by more than signatureBoundsTolerance
+of their size are not similar. This keeps shapes that are
+only scaled or moved copies of each other, like o and O
+or period and periodcentered, from being reported.
+"""
+
+import math
+import random
+from fontTools.pens.basePen import BasePen
+import defcon
+from . import registry
+from .indexes import getComponentGraph
+
+signatureGridSize = 24
+signatureHashCount = 48
+signatureBandSize = 4
+signatureBoundsTolerance = 0.1
+nearDuplicateThreshold = 0.85
+
+_hashPrime = (1 << 61) - 1
+_hashRandom = random.Random(0)
+_hashParameters = [
+    (_hashRandom.randrange(1, _hashPrime), _hashRandom.randrange(0, _hashPrime))
+    for i in range(signatureHashCount)
+]
+
+# ---------
+# Signature
+# ---------
+
+def geometricSignatureFactory(glyph):
+    """
+    Get the normalized geometric signature for the glyph.
+
+    Data structure:
+
+        (
+            frozenset(cellIndex, ...),
+            (minHash, ...),
+            (xMin, yMin, xMax, yMax)
+        )
+
+    None is returned if the glyph has no outline.
+    """
+    layer = glyph.layer
+    # make sure that changes to base glyphs
+    # will destroy this representation.
+    if layer is not None:
+        getComponentGraph(layer).observeGlyph(glyph)
+    pen = _SegmentCollectingPen(layer)
+    glyph.draw(pen)
+    segments = pen.segments
+    if not segments:
+        return None
+    xs = []
+    ys = []
+    for segment in segments:
+        for x, y in segment:
+            xs.append(x)
+            ys.append(y)
+    xMin = min(xs)
+    yMin = min(ys)
+    xMax = max(xs)
+    yMax = max(ys)
+    scale = max(xMax - xMin, yMax - yMin)
+    if scale == 0:
+        return None
+    grid = signatureGridSize
+    factor = (grid - 1) / scale
+    cells = set()
+    for segment in segments:
+        segment = [((x - xMin) * factor, (y - yMin) * factor) for x, y in segment]
+        for x, y in _sampleSegment(segment):
+            cells.add(int(round(y)) * grid + int(round(x)))
+    cells = frozenset(cells)
+    minHashes = tuple(
+        min((a * cell + b) % _hashPrime for cell in cells)
+        for a, b in _hashParameters
+    )
+    return cells, minHashes, (xMin, yMin, xMax, yMax)
+
+def _sampleSegment(segment):
+    # sample densely enough that consecutive
+    # samples never skip a cell of the grid
+    length = 0
+    for i in range(len(segment) - 1):
+        (x1, y1), (x2, y2) = segment[i], segment[i + 1]
+        length += math.hypot(x2 - x1, y2 - y1)
+    steps = max(1, int(math.ceil(length * 2)))
+    if len(segment) == 2:
+        (x1, y1), (x2, y2) = segment
+        for i in range(steps + 1):
+            t = i / steps
+            yield (x1 + (x2 - x1) * t, y1 + (y2 - y1) * t)
+    else:
+        (x0, y0), (x1, y1), (x2, y2), (x3, y3) = segment
+        for i in range(steps + 1):
+            t = i / steps
+            mt = 1 - t
+            a = mt * mt * mt
+            b = 3 * mt * mt * t
+            c = 3 * mt * t * t
+            d = t * t * t
+            yield (
+                a * x0 + b * x1 + c * x2 + d * x3,
+                a * y0 + b * y1 + c * y2 + d * y3
+            )
+
+
+class _SegmentCollectingPen(BasePen):
+
+    def __init__(self, glyphSet):
+        super().__init__(glyphSet)
+        self.segments = []
+
+    def _moveTo(self, pt):
+        self._start = pt
+
+    def _lineTo(self, pt):
+        self.segments.append((self._getCurrentPoint(), pt))
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        self.segments.append((self._getCurrentPoint(), pt1, pt2, pt3))
+
+    def _closePath(self):
+        current = self._getCurrentPoint()
+        if current != self._start:
+            self.segments.append((current, self._start))
+
+    def _endPath(self):
+        pass
+
+
+defcon.registerRepresentationFactory(
+    cls=defcon.Glyph,
+    name="GlyphNanny.geometricSignature",
+    factory=geometricSignatureFactory,
+    destructiveNotifications=["Glyph.ContoursChanged", "Glyph.ComponentsChanged"]
+)
+registry.componentDependentRepresentations.add("GlyphNanny.geometricSignature")
+
+# ---------------
+# Near Duplicates
+# ---------------
+
+def compareSignatures(signature1, signature2):
+    """
+    Get the similarity of two signatures. This is
+    the Jaccard similarity of the cells or 0 if the
+    bounds are too different.
+    """
+    cells1, minHashes1, bounds1 = signature1
+    cells2, minHashes2, bounds2 = signature2
+    size = max(
+        bounds1[2] - bounds1[0],
+        bounds1[3] - bounds1[1],
+        bounds2[2] - bounds2[0],
+        bounds2[3] - bounds2[1]
+    )
+    tolerance = size * signatureBoundsTolerance
+    for value1, value2 in zip(bounds1, bounds2):
+        if abs(value1 - value2) > tolerance:
+            return 0
+    return len(cells1 & cells2) / len(cells1 | cells2)
+
+def findNearDuplicateGlyphs(layer, glyphNames=None, threshold=nearDuplicateThreshold):
+    """
+    Find groups of glyphs in the layer that have
+    nearly identical outlines.
+
+    Data structure:
+
+        [
+            {
+                glyphs : [glyphName, ...]
+                similarity : number
+            },
+            ...
+        ]
+
+    similarity is the lowest similarity between
+    any two glyphs in the group. Glyphs that are
+    linked through other glyphs but are not similar
+    to each other are put in separate groups.
+    """
+    if glyphNames is None:
+        glyphNames = sorted(layer.keys())
+    bandSize = signatureBandSize
+    # glyphs with identical signatures are compared
+    # once. the first glyph with a signature stands
+    # in for the others.
+    signatures = {}
+    copies = {}
+    buckets = {}
+    for glyphName in glyphNames:
+        if glyphName not in layer:
+            continue
+        signature = layer[glyphName].getRepresentation("GlyphNanny.geometricSignature")
+        if signature is None:
+            continue
+        signatureKey = (signature[0], signature[2])
+        if signatureKey in copies:
+            copies[signatureKey].append(glyphName)
+            continue
+        copies[signatureKey] = [glyphName]
+        signatures[glyphName] = signature
+        minHashes = signature[1]
+        for band in range(0, len(minHashes), bandSize):
+            key = (band, minHashes[band:band + bandSize])
+            if key not in buckets:
+                buckets[key] = []
+            buckets[key].append(glyphName)
+    # verify the candidates
+    verified = {}
+    for names in buckets.values():
+        if len(names) < 2:
+            continue
+        for i, name1 in enumerate(names):
+            for name2 in names[i + 1:]:
+                pair = (name1, name2)
+                if pair in verified:
+                    continue
+                verified[pair] = compareSignatures(signatures[name1], signatures[name2])
+    # group the similar glyphs
+    parents = {}
+
+    def find(name):
+        while parents.get(name, name) != name:
+            name = parents[name]
+        return name
+
+    for (name1, name2), similarity in verified.items():
+        if similarity < threshold:
+            continue
+        root1 = find(name1)
+        root2 = find(name2)
+        if root1 != root2:
+            parents[root2] = root1
+    components = {}
+    for name in parents:
+        root = find(name)
+        if root not in components:
+            components[root] = set([root])
+        components[root].add(name)
+    for names in copies.values():
+        if len(names) > 1 and find(names[0]) not in components:
+            components[names[0]] = set([names[0]])
+    # the linked glyphs are only candidates. every pair
+    # in a group must be at or above the threshold, so
+    # split the components into groups that are.
+
+    def getSimilarity(name1, name2):
+        pair = (name1, name2)
+        if pair not in verified:
+            pair = (name2, name1)
+        if pair not in verified:
+            verified[pair] = compareSignatures(signatures[name1], signatures[name2])
+        return verified[pair]
+
+    order = {glyphName : index for index, glyphName in enumerate(glyphNames)}
+    report = []
+    for names in components.values():
+        groups = []
+        for name in sorted(names, key=lambda n: order[n]):
+            for group in groups:
+                similarities = [getSimilarity(other, name) for other in group["glyphs"]]
+                if min(similarities) >= threshold:
+                    group["glyphs"].append(name)
+                    group["similarity"] = min([group["similarity"]] + similarities)
+                    break
+            else:
+                groups.append(dict(glyphs=[name], similarity=1.0))
+        for group in groups:
+            glyphs = []
+            for name in group["glyphs"]:
+                signature = signatures[name]
+                glyphs.extend(copies[signature[0], signature[2]])
+            if len(glyphs) < 2:
+                continue
+            group["glyphs"] = sorted(glyphs, key=lambda n: order[n])
+            group["similarity"] = round(group["similarity"], 3)
+            report.append(group)
+    report.sort(key=lambda group: order[group["glyphs"][0]])
+    return report
+
+def testNearDuplicateGlyphs(layer):
+    """
+    Glyphs shouldn't have nearly identical outlines.
+    """
+    glyphNames = None
+    if layer.font is not None:
+        glyphNames = [
+            glyphName
+            for glyphName in layer.font.glyphOrder
+            if glyphName in layer
+        ]
+        glyphNames += sorted(set(layer.keys()) - set(glyphNames))
+    report = {}
+    for group in findNearDuplicateGlyphs(layer, glyphNames=glyphNames):
+        for glyphName in group["glyphs"]:
+            others = [other for other in group["glyphs"] if other != glyphName]
+            report[glyphName] = [
+                "The outline of this glyph is nearly identical to: %s." % " ".join(others)
+            ]
+    return report
+
+registry.registerTest(
+    identifier="nearDuplicateGlyphs",
+    level="font",
+    title="Near Duplicate Glyphs",
+    description="Outline is nearly identical to another glyph.",
+    testFunction=testNearDuplicateGlyphs,
+    defconClass=defcon.Layer,
+    destructiveNotifications=[
+        "Layer.GlyphAdded",
+        "Layer.GlyphDeleted",
+        "Layer.GlyphNameChanged",
+        "Layer.GlyphChanged"
+    ],
+    dependencies=["layerGlyphs"]
+)
@@ -1,6 +1,6 @@
 import math
 from fontTools.misc.arrayTools import calcBounds
-from lib.tools import bezierTools as rfBezierTools
+from fontTools.misc import bezierTools as ftBezierTools
 
 # -----------
 # Conversions
@@ -77,9 +77,94 @@ def calculateLineLineIntersection(a1a2, b1b2):
         return None
 
 def calculateLineCurveIntersection(line, curve):
-    points = curve + line
-    intersection = rfBezierTools.intersectCubicLine(*points)
-    return intersection
+    """
+    Find the places where a line segment
+    intersects a cubic curve.
+
+    Data structure:
+
+        [
+            (t, (x, y)),
+            ...
+        ]
+
+    The intersections are sorted by t.
+    """
+    return calculateLinesCurveIntersections([line], curve)[0]
+
+def calculateLinesCurveIntersections(lines, curve):
+    """
+    Find the places where each of the line
+    segments intersect a cubic curve.
+
+    Data structure:
+
+        [
+            [(t, (x, y)), ...],
+            ...
+        ]
+
+    There is one list of intersections per line.
+    """
+    # power basis coefficients of the curve
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = curve
+    ax = -x0 + 3 * x1 - 3 * x2 + x3
+    bx = 3 * x0 - 6 * x1 + 3 * x2
+    cx = -3 * x0 + 3 * x1
+    ay = -y0 + 3 * y1 - 3 * y2 + y3
+    by = 3 * y0 - 6 * y1 + 3 * y2
+    cy = -3 * y0 + 3 * y1
+    intersections = []
+    for (lx1, ly1), (lx2, ly2) in lines:
+        lineIntersections = []
+        intersections.append(lineIntersections)
+        dx = lx2 - lx1
+        dy = ly2 - ly1
+        lineLength = dx * dx + dy * dy
+        if lineLength == 0:
+            continue
+        # project the curve onto the normal of the line
+        # and solve for the places where it is zero.
+        nx = -dy
+        ny = dx
+        a = nx * ax + ny * ay
+        b = nx * bx + ny * by
+        c = nx * cx + ny * cy
+        d = nx * (x0 - lx1) + ny * (y0 - ly1)
+        roots = sorted(
+            _polishCubicRoot(a, b, c, d, t)
+            for t in ftBezierTools.solveCubic(a, b, c, d)
+        )
+        for t in roots:
+            if t < -_rootTolerance or t > 1 + _rootTolerance:
+                continue
+            t = min(1.0, max(0.0, t))
+            x = ((ax * t + bx) * t + cx) * t + x0
+            y = ((ay * t + by) * t + cy) * t + y0
+            # make sure the point is within the line segment
+            s = ((x - lx1) * dx + (y - ly1) * dy) / lineLength
+            if s < -_rootTolerance or s > 1 + _rootTolerance:
+                continue
+            if lineIntersections and abs(lineIntersections[-1][0] - t) < _rootTolerance:
+                continue
+            lineIntersections.append((t, (x, y)))
+    return intersections
+
+_rootTolerance = 1e-9
+
+def _polishCubicRoot(a, b, c, d, t, iterations=4):
+    # the closed form solution can lose precision,
+    # so refine the root with a few Newton steps.
+    for i in range(iterations):
+        value = ((a * t + b) * t + c) * t + d
+        derivative = (3 * a * t + 2 * b) * t + c
+        if derivative == 0:
+            break
+        step = value / derivative
+        t -= step
+        if abs(step) < 1e-15:
+            break
+    return t
 
 def calculateAngleOffset(angle, distance):
     A = 90
@@ -0,0 +1,212 @@
+"""
+Watch a UFO on disk and keep its report up to date.
+
+The font stays loaded between updates, so the indexes
+and representations of the glyphs that didn't change
+are reused. The UFO directory is polled for changed
+files. Changed .glif files are reloaded into the font
+and the affected glyphs are retested. The report and
+manifest are written in the same format that is used
+by testUFOIncremental.
+
+    python -m glyphNanny.watch font.ufo report.json
+"""
+
+import os
+import time
+import defcon
+from fontTools.ufoLib import UFOLibError
+from fontTools.ufoLib.glifLib import GlifLibError
+from .scripting import registeredTests
+from .incremental import (
+    makeManifest,
+    getGlyphsToRetest,
+    updateReport,
+    readReport,
+    writeReport,
+    hashFontInfo,
+    hashData
+)
+
+# Changes to these files require the
+# font to be loaded again.
+fontStructureFileNames = (
+    "metainfo.plist",
+    "layercontents.plist",
+    "lib.plist"
+)
+
+# A file that is read while an editor or version control
+# is still writing it can raise any of these. The update
+# is tried again on the next check.
+fileReadErrors = (
+    OSError,
+    ValueError,
+    SyntaxError,
+    UFOLibError,
+    GlifLibError
+)
+
+
+class UFOWatcher(object):
+
+    def __init__(self, path, reportPath, tests=None):
+        if tests is None:
+            tests = registeredTests().keys()
+        self.path = path
+        self.reportPath = reportPath
+        self.tests = sorted(tests)
+        self._loadFont()
+        previousManifest, previousReport = readReport(reportPath)
+        if previousManifest is None or previousManifest.get("tests") != self.tests:
+            previousManifest = None
+            previousReport = {}
+        retest = getGlyphsToRetest(previousManifest, self.manifest, self.tests)
+        self.report = updateReport(self.font, previousReport, retest, self.tests)
+        writeReport(self.reportPath, self.manifest, self.report)
+
+    def _loadFont(self):
+        # nothing is stored until everything has been
+        # read, so a failed load keeps the last good state.
+        font = defcon.Font(self.path)
+        layer = font.layers.defaultLayer
+        glyphsDirectory = os.path.join(self.path, layer._glyphSet.dirName)
+        manifest = makeManifest(font)
+        manifest["tests"] = self.tests
+        fileStates = self._getFileStates(glyphsDirectory)
+        self.font = font
+        self._glyphsDirectory = glyphsDirectory
+        self.manifest = manifest
+        self._fileStates = fileStates
+
+    def _getFileStates(self, glyphsDirectory=None):
+        if glyphsDirectory is None:
+            glyphsDirectory = self._glyphsDirectory
+        states = {}
+        for directory in (self.path, glyphsDirectory):
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    states[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return states
+
+    def update(self):
+        """
+        Look for changed files, retest the affected
+        glyphs and write the report. The names of the
+        retested glyphs are returned.
+
+        If a file can't be read, the error is raised
+        and the last good state is kept, so the same
+        changes are found again by the next update.
+        """
+        fileStates = self._getFileStates()
+        changedPaths = set(
+            path
+            for path in set(fileStates) | set(self._fileStates)
+            if fileStates.get(path) != self._fileStates.get(path)
+        )
+        if not changedPaths:
+            return []
+        changedFileNames = set(os.path.basename(path) for path in changedPaths)
+        glyphsContentsPath = os.path.join(self._glyphsDirectory, "contents.plist")
+        previousManifest = self.manifest
+        if glyphsContentsPath in changedPaths or changedFileNames & set(fontStructureFileNames):
+            # glyphs were added, removed or renamed
+            # or the font structure changed.
+            self._loadFont()
+        else:
+            self.manifest = self._updateManifest(changedPaths)
+            self._fileStates = fileStates
+        retest = getGlyphsToRetest(previousManifest, self.manifest, self.tests)
+        if not retest:
+            return []
+        self.report = updateReport(self.font, self.report, retest, self.tests)
+        writeReport(self.reportPath, self.manifest, self.report)
+        return sorted(retest.keys())
+
+    def _updateManifest(self, changedPaths):
+        font = self.font
+        layer = font.layers.defaultLayer
+        glyphSet = layer._glyphSet
+        manifest = dict(self.manifest)
+        manifest["glyphs"] = dict(manifest["glyphs"])
+        manifest["components"] = dict(manifest["components"])
+        if os.path.join(self.path, "fontinfo.plist") in changedPaths:
+            font.reloadInfo()
+            manifest["fontInfo"] = hashFontInfo(font)
+        fileNames = set(
+            os.path.basename(path)
+            for path in changedPaths
+            if os.path.dirname(path) == self._glyphsDirectory
+        )
+        reloadGlyphNames = []
+        for glyphName, fileName in glyphSet.contents.items():
+            if fileName not in fileNames:
+                continue
+            glyphHash = hashData(glyphSet.getGLIF(glyphName))
+            if glyphHash == manifest["glyphs"].get(glyphName):
+                continue
+            manifest["glyphs"][glyphName] = glyphHash
+            reloadGlyphNames.append(glyphName)
+        if reloadGlyphNames:
+            font.reloadLayers(
+                dict(
+                    layers={
+                        layer.name : dict(glyphNames=reloadGlyphNames)
+                    }
+                )
+            )
+            for glyphName in reloadGlyphNames:
+                baseGlyphNames = sorted(set(
+                    component.baseGlyph for component in layer[glyphName].components
+                ))
+                if baseGlyphNames:
+                    manifest["components"][glyphName] = baseGlyphNames
+                else:
+                    manifest["components"].pop(glyphName, None)
+        return manifest
+
+    def run(self, interval=0.25, callback=None, errorCallback=None):
+        """
+        Update every interval seconds until interrupted.
+        callback, if given, is called with the names of
+        the retested glyphs after each update that
+        retested glyphs. errorCallback, if given, is
+        called with the error when files can't be read.
+        The update is tried again after the interval.
+        """
+        while True:
+            try:
+                glyphNames = self.update()
+            except fileReadErrors as error:
+                if errorCallback is not None:
+                    errorCallback(error)
+                glyphNames = []
+            if glyphNames and callback is not None:
+                callback(glyphNames)
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Watch a UFO and keep a Glyph Nanny report up to date.")
+    parser.add_argument("path", help="The UFO to watch.")
+    parser.add_argument("reportPath", help="Where to write the report.")
+    parser.add_argument("--interval", type=float, default=0.25, help="Seconds between checks for changes.")
+    parser.add_argument("--tests", nargs="*", default=None, help="Identifiers of the tests to run.")
+    arguments = parser.parse_args()
+    watcher = UFOWatcher(arguments.path, arguments.reportPath, tests=arguments.tests)
+
+    def printGlyphNames(glyphNames):
+        print("Retested: %s" % " ".join(glyphNames))
+
+    def printError(error):
+        print("Couldn't read the UFO, trying again: %s" % error)
+
+    try:
+        watcher.run(interval=arguments.interval, callback=printGlyphNames, errorCallback=printError)
+    except KeyboardInterrupt:
+        pass